@@ -0,0 +1,309 @@
+"""Benchmarks for the overhead of @type_checked over the plain function.
+
+Every case is timed calling the wrapped function and the same function
+undecorated, with the difference being what pychecked costs per call. The
+peak memory allocated during a single call is measured with tracemalloc.
+
+Usage::
+
+    python bench/run.py [--config codegen=true] [--output results.json]
+                        [--compare baseline.json] [cases ...]
+
+The json_ cases instead time pychecked.load_json on a file against the plain
+json.load of it followed by validation, the "overhead" of which is usually
+negative.
+
+Results are written as JSON, so runs on two commits can be compared with
+--compare, which prints the change in overhead for each case.
+"""
+
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pychecked  # noqa: E402
+from pychecked.type_checking import Config  # noqa: E402
+from pychecked.type_checking import type_checked  # noqa: E402
+from pychecked.type_checking import _do_validation  # noqa: E402
+
+
+class Point(object):
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+class PointFromPair(Point):
+    def __init__(self, x_y):
+        super(PointFromPair, self).__init__(*x_y)
+
+
+def _scalar(something:int):
+    return something
+
+
+def _to_str(something:str):
+    return something
+
+
+def _to_bool(something:bool):
+    return something
+
+
+def _int_list(something:[int]):
+    return something
+
+
+def _nested(something:{str: (bool, int, {str: int}, str)}):
+    return something
+
+
+def _positional(something:(str, int, bool)):
+    return something
+
+
+def _custom(something:PointFromPair):
+    return something
+
+
+def _star(first:int, *args:float, **kwargs:str):
+    return first
+
+
+# name: (function, args, kwargs, expected exception when wrapped or None)
+CASES = {
+    "int_exact": (_scalar, (1,), {}, None),
+    "int_from_str": (_scalar, ("12",), {}, None),
+    "int_from_float_str": (_scalar, ("12.5",), {}, None),
+    "str_from_int": (_to_str, (12,), {}, None),
+    "int_from_bool": (_scalar, (True,), {}, None),
+    "bool_exact": (_to_bool, (False,), {}, None),
+    "bool_from_int": (_to_bool, (1,), {}, None),
+    "int_list_10": (_int_list, (list(range(10)),), {}, None),
+    "int_list_1000": (_int_list, (list(range(1000)),), {}, None),
+    "int_list_100000": (_int_list, (list(range(100000)),), {}, None),
+    "int_list_1000_from_str": (
+        _int_list, ([str(i) for i in range(1000)],), {}, None),
+    "nested_dict_exact": (
+        _nested, ({"a": (True, 1, {"b": 2}, "c")},), {}, None),
+    "nested_dict_coerce": (
+        _nested, ({1: ("True", "1", {2: "2"}, False)},), {}, None),
+    "tuple_positional": (_positional, (("a", 1, True),), {}, None),
+    "custom_class": (_custom, ((1, 2),), {}, None),
+    "star_args_kwargs": (
+        _star, (1, 2.0, 3, "4.5"), {"a": "b", "c": 5}, None),
+    "failure": (_scalar, ("abc",), {}, TypeError),
+}
+
+# name: (spec, document, expected exception when validated or None)
+JSON_CASES = {
+    "json_int_lists": (
+        {str: [int]},
+        {str(key): list(range(1000)) for key in range(100)},
+        None,
+    ),
+    "json_records_coerce": (
+        [(str, int, bool)],
+        [[index, str(index), 1] for index in range(10000)],
+        None,
+    ),
+    "json_early_failure": (
+        [int],
+        ["zero"] + list(range(100000)),
+        TypeError,
+    ),
+}
+
+
+def _loop(func, args, kwargs, error, number):
+    """Returns the seconds taken to call func number times."""
+
+    if error is None:
+        start = time.perf_counter()
+        for _ in range(number):
+            func(*args, **kwargs)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(number):
+        try:
+            func(*args, **kwargs)
+        except error:
+            pass
+    return time.perf_counter() - start
+
+
+def _per_call(func, args, kwargs, error, number, repeat):
+    """Returns the best nanoseconds per call of repeat runs."""
+
+    best = min(
+        _loop(func, args, kwargs, error, number) for _ in range(repeat)
+    )
+    return best / number * 1e9
+
+
+def _peak_bytes(func, args, kwargs, error):
+    """Returns the peak bytes traced during a single call of func."""
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        try:
+            func(*args, **kwargs)
+        except Exception as exc:
+            if error is None or not isinstance(exc, error):
+                raise
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+
+def _number_for(func, args, kwargs, error, budget=0.05):
+    """Returns the number of calls which take about budget seconds."""
+
+    number = 1
+    while _loop(func, args, kwargs, error, number) < budget / 10:
+        number *= 10
+    return number * 10
+
+
+def _json_case(name, directory):
+    """Returns the (plain, checked, error) loaders of a JSON case."""
+
+    spec, document, error = JSON_CASES[name]
+    path = os.path.join(directory, name + ".json")
+    with open(path, "w") as document_file:
+        json.dump(document, document_file)
+
+    def plain():
+        with open(path, "rb") as document_file:
+            return _do_validation(spec, json.load(document_file))
+
+    def checked():
+        with open(path, "rb") as document_file:
+            return pychecked.load_json(spec, document_file)
+
+    return plain, checked, error
+
+
+def run_case(name, repeat, directory):
+    """Returns the results dictionary of the case name."""
+
+    if name in JSON_CASES:
+        plain_func, wrapped, error = _json_case(name, directory)
+        args, kwargs = (), {}
+
+        number = _number_for(wrapped, args, kwargs, error)
+        checked = _per_call(wrapped, args, kwargs, error, number, repeat)
+        plain = _per_call(plain_func, args, kwargs, error, number, repeat)
+
+        return {
+            "number": number,
+            "plain_ns": round(plain, 1),
+            "checked_ns": round(checked, 1),
+            "overhead_ns": round(checked - plain, 1),
+            "ratio": round(checked / plain, 2) if plain else None,
+            "plain_peak_bytes": _peak_bytes(plain_func, args, kwargs, error),
+            "checked_peak_bytes": _peak_bytes(wrapped, args, kwargs, error),
+        }
+
+    func, args, kwargs, error = CASES[name]
+    wrapped = type_checked(func)
+
+    # the plain function must not raise, only the wrapped one
+    number = _number_for(wrapped, args, dict(kwargs), error)
+    checked = _per_call(wrapped, args, kwargs, error, number, repeat)
+    plain = _per_call(func, args, kwargs, None, number, repeat)
+
+    return {
+        "number": number,
+        "plain_ns": round(plain, 1),
+        "checked_ns": round(checked, 1),
+        "overhead_ns": round(checked - plain, 1),
+        "ratio": round(checked / plain, 2) if plain else None,
+        "plain_peak_bytes": _peak_bytes(func, args, kwargs, None),
+        "checked_peak_bytes": _peak_bytes(wrapped, args, kwargs, error),
+    }
+
+
+def compare(results, baseline):
+    """Print the change in overhead of each case from baseline."""
+
+    print("{:<28}{:>14}{:>14}{:>10}".format(
+        "case", "before ns", "after ns", "change"))
+    for name, result in results["cases"].items():
+        before = baseline["cases"].get(name)
+        if before is None:
+            continue
+        old, new = before["overhead_ns"], result["overhead_ns"]
+        change = "{:+.0%}".format((new - old) / old) if old > 0 else "-"
+        print("{:<28}{:>14.1f}{:>14.1f}{:>10}".format(name, old, new, change))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("cases", nargs="*", help="cases to run, default all")
+    parser.add_argument(
+        "--config", action="append", default=[], metavar="KEY=JSON",
+        help="Config key to set before wrapping, eg codegen=true",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="file to write the JSON results to")
+    parser.add_argument("--compare", help="JSON results to compare against")
+    options = parser.parse_args(argv)
+
+    for setting in options.config:
+        key, _, value = setting.partition("=")
+        Config.set(key, json.loads(value))
+
+    names = options.cases or list(CASES) + list(JSON_CASES)
+    unknown = set(names) - set(CASES) - set(JSON_CASES)
+    if unknown:
+        parser.error("unknown cases: {}".format(", ".join(sorted(unknown))))
+
+    results = {
+        "pychecked": pychecked.__version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "config": {
+            key: value for key, value in Config.config().items()
+            if key != "executor"
+        },
+        "cases": {},
+    }
+    directory = tempfile.mkdtemp(prefix="pychecked-bench-")
+    try:
+        for name in names:
+            results["cases"][name] = result = run_case(
+                name, options.repeat, directory)
+            print("{:<28}{:>12.1f} ns{:>8.2f}x{:>10} B".format(
+                name, result["overhead_ns"], result["ratio"],
+                result["checked_peak_bytes"]), file=sys.stderr)
+    finally:
+        shutil.rmtree(directory)
+
+    output = json.dumps(results, indent=2, sort_keys=True, default=repr)
+    if options.output:
+        with open(options.output, "w") as results_file:
+            results_file.write(output + "\n")
+    else:
+        print(output)
+
+    if options.compare:
+        with open(options.compare) as baseline_file:
+            compare(results, json.load(baseline_file))
+
+
+if __name__ == "__main__":
+    main()
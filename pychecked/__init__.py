@@ -32,6 +32,21 @@ OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import sys
 
+from pychecked.bulk import validate
+from pychecked.bulk import validate_many
+from pychecked.coercions import register_coercion
+from pychecked.errors import PycheckedTypeError
+from pychecked.jsonstream import load_json
+from pychecked.memo import memoize
+from pychecked.memo import never_memoize
+from pychecked.metrics import stats
+from pychecked.metrics import reset_stats
+from pychecked.registry import disable_all
+from pychecked.registry import enable_all
+from pychecked.startup import install_import_hook
+from pychecked.startup import uninstall_import_hook
+from pychecked.startup import precompile
+from pychecked.startup import warmup
 from pychecked.type_checking import Config
 from pychecked.type_checking import type_checked
 
@@ -41,6 +56,28 @@ class TypeChecked(object):
 
     __version__ = "0.0.5"
 
+    # keeps the submodules importable once this replaces the package
+    __name__ = __name__
+    __path__ = __path__
+    __spec__ = __spec__
+
+    PycheckedTypeError = PycheckedTypeError
+
+    validate = staticmethod(validate)
+    validate_many = staticmethod(validate_many)
+    load_json = staticmethod(load_json)
+    register_coercion = staticmethod(register_coercion)
+    memoize = staticmethod(memoize)
+    never_memoize = staticmethod(never_memoize)
+    stats = staticmethod(stats)
+    disable_all = staticmethod(disable_all)
+    enable_all = staticmethod(enable_all)
+    warmup = staticmethod(warmup)
+    precompile = staticmethod(precompile)
+    install_import_hook = staticmethod(install_import_hook)
+    uninstall_import_hook = staticmethod(uninstall_import_hook)
+    reset_stats = staticmethod(reset_stats)
+
     def __call__(self, *args, **kwargs):
         return type_checked(*args, **kwargs)
 
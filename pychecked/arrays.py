@@ -0,0 +1,153 @@
+"""Fast paths for validating arrays against homogeneous specs like [int].
+
+Rather than turning an array into a list and validating every member, the
+type of the members is decided once for the whole array and the array itself
+is passed through.
+
+For array.array, memoryview and bytearray that is decided from the format
+code of the buffer, eg an array.array("d") is a valid [float]. For numpy
+arrays it is decided by the dtype, which can also be converted as a whole.
+
+NumPy is never imported here. If it hasn't been imported by anything else, no
+value can be a numpy.ndarray, so there is nothing to check for.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import sys
+import array
+
+
+# spec type -> dtype kinds which already are that type
+_NDARRAY_VALID = {
+    bool: "b",
+    int: "iu",
+    float: "f",
+    complex: "c",
+}
+
+# spec type -> dtype kinds which can be coerced with astype, and the dtype
+_NDARRAY_COERCIBLE = {
+    bool: ("iuf", "bool"),
+    int: ("bf", "int64"),
+    float: ("biu", "float64"),
+    complex: ("biuf", "complex128"),
+}
+
+# spec type -> buffer format codes (array typecodes and struct formats)
+_BUFFER_VALID = {
+    bool: "?",
+    int: "bBhHiIlLqQnN",
+    float: "fde",
+    complex: "",
+}
+
+# floats in [_INT64_MIN, _INT64_END) truncate to int64 without wrapping
+_INT64_MIN = -2 ** 63
+_INT64_END = 2 ** 63
+
+# the spec types arrays can be checked against
+ARRAY_TYPES = frozenset(_NDARRAY_VALID)
+
+
+def validate_array(value, type_, settings):
+    """Validate an array of any supported kind against a [type_] spec.
+
+    Args::
+
+        value: the object to validate, which may not be an array at all
+        type_: one of ARRAY_TYPES, the type each member should be
+        settings: the config Snapshot to validate with
+
+    Returns:
+        the array, or a converted copy of it, or None if the members need to
+        be validated individually
+    """
+
+    if isinstance(value, (array.array, memoryview, bytearray)):
+        return validate_buffer(value, type_)
+    return validate_ndarray(value, type_, settings)
+
+
+def validate_buffer(value, type_):
+    """Validate an array.array, memoryview or bytearray by its format code.
+
+    Returns:
+        the value if its format proves all members are type_, otherwise None
+    """
+
+    if isinstance(value, array.array):
+        code = value.typecode
+    elif isinstance(value, bytearray):
+        code = "B"
+    elif value.ndim != 1:
+        return None
+    else:
+        code = value.format.lstrip("@=<>!")
+
+    if len(code) == 1 and code in _BUFFER_VALID[type_]:
+        return value
+    return None
+
+
+def validate_ndarray(value, type_, settings):
+    """Validate a one dimensional numpy.ndarray against a [type_] spec.
+
+    Args::
+
+        value: the object to validate, which may not be an ndarray at all
+        type_: one of ARRAY_TYPES, the type each member should be
+        settings: the config Snapshot to validate with
+
+    Returns:
+        the array if its dtype already matches, a converted copy if coercion
+        is on and astype can convert it, otherwise None to have the members
+        validated individually
+    """
+
+    numpy = sys.modules.get("numpy")
+    if numpy is None or not isinstance(value, numpy.ndarray) or \
+       value.ndim != 1:
+        return None
+
+    kind = value.dtype.kind
+    if kind in _NDARRAY_VALID[type_]:
+        return value
+
+    kinds, dtype = _NDARRAY_COERCIBLE[type_]
+    if not settings.coerce or kind not in kinds:
+        return None
+    elif type_ is int and kind == "f" and not (
+            (value >= _INT64_MIN) & (value < _INT64_END)).all():
+        # int(nan) raises and floats past int64 would wrap around in astype,
+        # let the members be checked to raise or convert exactly instead
+        return None
+
+    return value.astype(dtype)
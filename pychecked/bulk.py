@@ -0,0 +1,135 @@
+"""Validating values which never pass through a wrapped function.
+
+The same specs used to annotate functions can be used to validate values
+directly, with validate() for one value or validate_many() for a stream of
+them, eg rows off of a queue. The spec is compiled once and the config is
+resolved once for the whole stream.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import collections
+
+from pychecked.config import Config
+from pychecked.errors import PycheckedTypeError
+from pychecked.validators import compile_spec
+
+
+class Invalid(collections.namedtuple("Invalid", "index value error")):
+    """Stands in for a value which failed validation in validate_many.
+
+    Attributes::
+
+        index: the position of the value in the values validated
+        value: the original value
+        error: the TypeError or ValueError raised validating it
+    """
+
+    __slots__ = ()
+
+
+def validate(spec, value):
+    """Validate a value against a spec, as if it was an annotated argument.
+
+    Returns:
+        value, possibly coerced to spec
+
+    Raises::
+
+        ValueError on incorrect/not-callable spec to validate with
+        PycheckedTypeError (a TypeError) when value is not spec and/or
+        cannot be coerced
+    """
+
+    return compile_spec(spec).validate(value, Config.snapshot())
+
+
+def validate_many(spec, values, fail_fast=True, chunk_size=None):
+    """Validate an iterable of values against one spec.
+
+    Values are only read from the iterable as results are consumed. The
+    config in effect when iteration starts is used for all of the values,
+    the arguments are checked straight away.
+
+    Args::
+
+        spec: the annotation to validate each value against
+        values: iterable of values to validate
+        fail_fast: raise at the first invalid value when True, with its index
+                   in the error's path, otherwise an Invalid is yielded in
+                   its place and validation continues
+        chunk_size: if given, yield lists of up to this many results
+
+    Returns:
+        a generator of each validated value, or of lists of them if
+        chunk_size was given
+    """
+
+    if chunk_size is not None and chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1, not {}.".format(
+            chunk_size))
+
+    results = _validate_each(compile_spec(spec), values, fail_fast)
+    if chunk_size is None:
+        return results
+    return _chunked(results, chunk_size)
+
+
+def _chunked(results, chunk_size):
+    chunk = []
+    for result in results:
+        chunk.append(result)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def _validate_each(validator, values, fail_fast):
+    validate = validator.validate
+    settings = Config.snapshot()
+
+    if fail_fast:
+        for index, value in enumerate(values):
+            try:
+                checked = validate(value, settings)
+            except PycheckedTypeError as error:
+                error.at_index(index)
+                raise
+            yield checked
+        return
+
+    for index, value in enumerate(values):
+        try:
+            yield validate(value, settings)
+        except (TypeError, ValueError) as error:
+            yield Invalid(index, value, error)
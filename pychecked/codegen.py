@@ -0,0 +1,443 @@
+"""Source generated wrappers specialized to a function's exact signature.
+
+Rather than walking a BindingPlan with *args and **kwargs, this writes out the
+python source for a wrapper which has the same parameters as the function it
+wraps, with an inline check per annotated parameter. Values which are already
+exactly the annotated type go straight through, nothing is repacked.
+
+This is opt-in through the codegen Config key. The generated source is kept
+on the wrapper as generated_source for debugging, and is registered with
+linecache so it shows up in tracebacks.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import inspect
+import linecache
+import itertools
+
+from pychecked import metrics
+from pychecked.errors import PycheckedTypeError
+from pychecked.validators import checked_generator
+
+
+_PREFIX = "_pychecked_"
+_COUNTER = itertools.count()
+
+
+class _Missing(object):
+    """Default for annotated parameters so defaults aren't validated."""
+
+    def __repr__(self):
+        return "<missing>"
+
+
+MISSING = _Missing()
+
+
+class _Unchecked(object):
+    """Stands in for a BindingPlan, to generate a wrapper with no checks."""
+
+    keywords = {}
+    varargs = varkw = returns = None
+
+
+UNCHECKED = _Unchecked()
+
+# (kind, name, free variables) -> passthrough code, or None if it can't match
+_PASSTHROUGHS = {}
+
+_PASSTHROUGH = {
+    "def": [
+        "return func(*{0}args, **{0}kwargs)",
+    ],
+    "async def": [
+        "return await func(*{0}args, **{0}kwargs)",
+    ],
+    "async generator": [
+        "{0}generator = func(*{0}args, **{0}kwargs)",
+        "try:",
+        "    {0}item = await {0}generator.__anext__()",
+        "    while True:",
+        "        try:",
+        "            {0}sent = yield {0}item",
+        "        except GeneratorExit:",
+        "            await {0}generator.aclose()",
+        "            raise",
+        "        except BaseException as {0}error:",
+        "            {0}item = await {0}generator.athrow({0}error)",
+        "        else:",
+        "            {0}item = await {0}generator.asend({0}sent)",
+        "except StopAsyncIteration:",
+        "    return",
+    ],
+}
+
+
+def _varargs_checker(validator, name):
+    """Returns a callable to validate all of *args, copying only if needed."""
+
+    validate = validator.validate
+    type_ = validator.exact_type
+
+    def _validate_all(values, settings):
+        checked = []
+        try:
+            for value in values:
+                checked.append(validate(value, settings))
+        except PycheckedTypeError as error:
+            error.at_index(len(checked))
+            error.at_arg(name)
+            raise
+        return tuple(checked)
+
+    if type_ is not None:
+        def _check(values, settings):
+            for value in values:
+                if type(value) is not type_:
+                    return _validate_all(values, settings)
+            return values
+    else:
+        _check = _validate_all
+
+    return _check
+
+
+def _varkw_checker(validator, name):
+    """Returns a callable to validate all of **kwargs in place."""
+
+    validate = validator.validate
+    type_ = validator.exact_type
+
+    def _check(values, settings):
+        for key, value in values.items():
+            if type(value) is not type_:
+                try:
+                    values[key] = validate(value, settings)
+                except PycheckedTypeError as error:
+                    error.at_key(key)
+                    error.at_arg(name)
+                    raise
+
+    return _check
+
+
+def _check_line(name, index, validator, define, default):
+    """Returns the source lines validating the parameter name."""
+
+    validate = define("validate_{}".format(index), validator.validate)
+    condition = []
+
+    if default:
+        condition.append("{} is not {}missing".format(name, _PREFIX))
+
+    if validator.exact_type is not None:
+        # the common case of the value already being correct stays inline
+        exact = define("type_{}".format(index), validator.exact_type)
+        condition.append(
+            "{}type({}) is not {}".format(_PREFIX, name, exact))
+
+    lines = ["{0} = {1}({0}, {2}settings)".format(name, validate, _PREFIX)]
+    if condition:
+        lines = ["if {}:".format(" and ".join(condition)), "    " + lines[0]]
+
+    # costs nothing until something fails, then names the parameter
+    return ["try:"] + ["    " + line for line in lines] + [
+        "except {}error as {}raised:".format(_PREFIX, _PREFIX),
+        "    {}raised.at_arg({!r})".format(_PREFIX, name),
+        "    raise",
+    ]
+
+
+def generate(func, plan, snapshot, sample=None, namespace=None, record=None):
+    """Generate and compile a wrapper for func.
+
+    Args::
+
+        func: the plain python function to wrap
+        plan: the BindingPlan for func
+        snapshot: callable returning the config Snapshot at call time
+        sample: the function's own sampling policy, if it has one
+        namespace: the globals of an earlier wrapper for func, to add the
+                   names the new code uses to, see regenerate()
+        record: the FunctionStats to record validation in, if stats are kept
+
+    Returns:
+        the generated function, or None if func can't be specialized (it's
+        not a plain python function, or it's an async generator function)
+    """
+
+    if not inspect.isfunction(func) or inspect.isasyncgenfunction(func):
+        return None
+
+    try:
+        signature = inspect.signature(func, follow_wrapped=False)
+    except (TypeError, ValueError):
+        return None
+
+    # compiled into a scope of its own, and only then added to namespace,
+    # which may be the globals of a wrapper other threads are running
+    scope = {
+        _PREFIX + "func": func,
+        _PREFIX + "snapshot": snapshot,
+        _PREFIX + "missing": MISSING,
+        _PREFIX + "error": PycheckedTypeError,
+        # a parameter named type would otherwise shadow the builtin
+        _PREFIX + "type": type,
+        _PREFIX + "plans": {},
+    }
+    if namespace is not None:
+        scope[_PREFIX + "plans"] = namespace[_PREFIX + "plans"]
+    plans = scope[_PREFIX + "plans"]
+
+    def _define(name, value):
+        """Adds value to scope under a name of its own for plan.
+
+        Code generated for an earlier plan may still be running, and look
+        its names up, so they're never replaced by another plan's values.
+        """
+
+        if plan not in plans:
+            plans[plan] = "_g{}".format(len(plans)) if plans else ""
+        name = "{}{}{}".format(_PREFIX, name, plans[plan])
+        scope[name] = value
+        return name
+
+    params = []
+    call = []
+    checks = []
+    fills = []
+    seen_positional_only = False
+    seen_keyword_only = False
+
+    for index, param in enumerate(signature.parameters.values()):
+        name = param.name
+        if name.startswith(_PREFIX):
+            return None
+
+        if param.kind is param.POSITIONAL_ONLY:
+            seen_positional_only = True
+        elif seen_positional_only:
+            params.append("/")
+            seen_positional_only = False
+
+        if param.kind is param.VAR_POSITIONAL:
+            params.append("*" + name)
+            call.append("*" + name)
+            if plan.varargs is not None:
+                checker = _define(
+                    "varargs", _varargs_checker(plan.varargs, name))
+                checks.extend([
+                    "if {}:".format(name),
+                    "    {0} = {1}({0}, {2}settings)".format(
+                        name, checker, _PREFIX),
+                ])
+            seen_keyword_only = True
+            continue
+
+        if param.kind is param.VAR_KEYWORD:
+            params.append("**" + name)
+            call.append("**" + name)
+            if plan.varkw is not None:
+                checker = _define("varkw", _varkw_checker(plan.varkw, name))
+                checks.extend([
+                    "if {}:".format(name),
+                    "    {}({}, {}settings)".format(checker, name, _PREFIX),
+                ])
+            continue
+
+        if param.kind is param.KEYWORD_ONLY:
+            if not seen_keyword_only:
+                params.append("*")
+                seen_keyword_only = True
+            call.append("{0}={0}".format(name))
+        else:
+            call.append(name)
+
+        validator = plan.keywords.get(name)
+        has_default = param.default is not param.empty
+        if has_default:
+            # every default is filled in by the code, so the defaults of the
+            # wrapper are the same whether it checks its parameters or not
+            default = "{}default_{}".format(_PREFIX, index)
+            scope[default] = param.default
+            params.append("{}={}missing".format(name, _PREFIX))
+            fills.extend([
+                "if {} is {}missing:".format(name, _PREFIX),
+                "    {} = {}".format(name, default),
+            ])
+        else:
+            params.append(name)
+
+        if validator is not None:
+            checks.extend(
+                _check_line(name, index, validator, _define, has_default)
+            )
+
+    if seen_positional_only:
+        params.append("/")
+
+    call = "{}func({})".format(_PREFIX, ", ".join(call))
+    if inspect.iscoroutinefunction(func):
+        lines = ["async def _type_checked({}):".format(", ".join(params))]
+        call = "await " + call
+    else:
+        lines = ["def _type_checked({}):".format(", ".join(params))]
+
+    if plan.returns is not None:
+        validator = plan.returns
+        if record is not None:
+            validator = metrics.InstrumentedValidator(validator, record)
+        if inspect.isgeneratorfunction(func):
+            scope[_PREFIX + "checked"] = checked_generator
+            checked = "{0}checked({1}, {2}, {0}settings)".format(
+                _PREFIX, call, _define("returns", validator))
+        else:
+            checked = "{}({}, {}settings)".format(
+                _define("returns", validator.validate), call, _PREFIX)
+        returns = [
+            "if {}settings.check_returns:".format(_PREFIX),
+        ]
+        returns.extend("    " + line for line in fills)
+        returns.append("    return " + checked)
+    else:
+        returns = []
+
+    if not checks and record is not None:
+        # the call still takes a snapshot and is counted as validated, as it
+        # is without codegen, even when there is nothing to check
+        checks = ["pass"]
+    if checks and record is not None:
+        scope[_PREFIX + "start"] = record.start
+        scope[_PREFIX + "stop"] = record.stop
+        scope[_PREFIX + "failed"] = record.failed
+        checks = [
+            "{0}token = {0}start()".format(_PREFIX),
+            "try:",
+        ] + ["    " + line for line in checks] + [
+            "except (TypeError, ValueError) as {}failure:".format(_PREFIX),
+            "    {0}failed({0}failure)".format(_PREFIX),
+            "    raise",
+            "finally:",
+            "    {0}stop({0}token)".format(_PREFIX),
+        ]
+    checks.extend(returns)
+
+    if checks:
+        if sample is None:
+            sampled = "({0}settings.sampling is None or " \
+                      "{0}settings.sampling())".format(_PREFIX)
+        else:
+            scope[_PREFIX + "sample"] = sample
+            sampled = "{}sample()".format(_PREFIX)
+
+        lines.extend([
+            "    {0}settings = {0}snapshot()".format(_PREFIX),
+            "    if {0}settings.active and {1}:".format(_PREFIX, sampled),
+        ])
+        lines.extend("        " + line for line in checks)
+    lines.extend("    " + line for line in fills)
+    lines.append("    return " + call)
+    source = "\n".join(lines) + "\n"
+
+    filename = "<pychecked {} {}>".format(func.__qualname__, next(_COUNTER))
+    exec(compile(source, filename, "exec"), scope)
+    linecache.cache[filename] = (
+        len(source), None, source.splitlines(True), filename,
+    )
+
+    generated = scope.pop("_type_checked")
+    if namespace is not None:
+        namespace.update(scope)
+    generated.generated_source = source
+    return generated
+
+
+def regenerate(generated, func, plan, snapshot, sample=None, record=None):
+    """Regenerate the source of a wrapper from generate() in place.
+
+    The wrapper object is kept (so existing references see the change), and
+    other threads can go on calling it throughout. The names the new code
+    uses are added to its globals first, without touching any the old code
+    uses, then the code is swapped in with a single assignment.
+    """
+
+    namespace = generated.__globals__
+    replacement = generate(func, plan, snapshot, sample, namespace, record)
+    generated.__code__ = replacement.__code__
+    generated.generated_source = replacement.generated_source
+
+
+def passthrough(code):
+    """Returns code for a closure which calls func straight through.
+
+    The code can be swapped in for the code of a closure wrapping func, it
+    has the same free variables as code (one of which must be func).
+
+    Returns:
+        the code object, or None if it can't be made to match code
+    """
+
+    if code.co_flags & inspect.CO_ASYNC_GENERATOR:
+        kind, define = "async generator", "async def"
+    elif code.co_flags & inspect.CO_COROUTINE:
+        kind = define = "async def"
+    else:
+        kind = define = "def"
+
+    freevars = code.co_freevars
+    key = (kind, code.co_name, freevars)
+    try:
+        return _PASSTHROUGHS[key]
+    except KeyError:
+        pass
+
+    lines = [
+        "def {}factory({}):".format(_PREFIX, ", ".join(freevars)),
+        "    {} {}(*{}args, **{}kwargs):".format(
+            define, code.co_name, _PREFIX, _PREFIX),
+        # references every free variable, but is compiled out
+        "        if False:",
+        "            {},".format(", ".join(freevars)),
+    ]
+    lines.extend(
+        "        " + line.format(_PREFIX) for line in _PASSTHROUGH[kind]
+    )
+    lines.append("    return {}".format(code.co_name))
+    source = "\n".join(lines) + "\n"
+
+    namespace = {}
+    exec(compile(source, "<pychecked passthrough>", "exec"), namespace)
+    factory = namespace[_PREFIX + "factory"]
+    replacement = factory(*freevars).__code__
+
+    if replacement.co_freevars != freevars or "func" not in freevars:
+        replacement = None
+    return _PASSTHROUGHS.setdefault(key, replacement)
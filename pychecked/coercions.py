@@ -0,0 +1,107 @@
+"""Registry of converters to coerce values of one type into another.
+
+By default a value is coerced by calling the annotated type with it, which
+doesn't work for types taking more than one argument. A converter registered
+for a source and target type is called instead, with the value as its only
+argument:
+
+    register_coercion(tuple, XYObject, lambda x_y: XYObject(*x_y))
+
+Converters are found along the MRO of the value's type, so one registered
+for tuple also converts namedtuples. Lookups are cached per source type by
+each validator, registering or unregistering a converter resets them.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import threading
+
+
+# (source type, target type) to converter
+_REGISTRY = {}
+_REGISTRY_LOCK = threading.Lock()
+
+# bumped on every change to the registry, so cached lookups can be dropped
+version = 0
+
+
+def register_coercion(source, target, converter):
+    """Register converter to coerce instances of source into target.
+
+    Args::
+
+        source: the type of the values to convert, or a base class of them
+        target: the annotated type to convert them into
+        converter: callable taking the value and returning a target. It can
+                   raise ValueError or TypeError for values it can't convert
+
+    Raises:
+        ValueError if source or target is not a type or converter is not
+        callable
+    """
+
+    for type_ in (source, target):
+        if not isinstance(type_, type):
+            raise ValueError("{} is not a type.".format(type_))
+    if not callable(converter):
+        raise ValueError("{} is not callable.".format(converter))
+
+    _update(source, target, converter)
+
+
+def unregister_coercion(source, target):
+    """Remove the converter registered for source and target, if any."""
+
+    _update(source, target, None)
+
+
+def find(source, target):
+    """Returns the converter for source into target, or None.
+
+    The first class in source's MRO which has a converter registered for
+    target is used.
+    """
+
+    for base in source.__mro__:
+        converter = _REGISTRY.get((base, target))
+        if converter is not None:
+            return converter
+    return None
+
+
+def _update(source, target, converter):
+    global version
+
+    with _REGISTRY_LOCK:
+        if converter is None:
+            _REGISTRY.pop((source, target), None)
+        else:
+            _REGISTRY[(source, target)] = converter
+        version += 1
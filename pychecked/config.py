@@ -0,0 +1,245 @@
+"""Configuration for pychecked.
+
+Config is global and sticky, every change bumps its version. Readers take a
+snapshot, which is an immutable namedtuple cached until the version changes,
+so a wrapped function resolves its settings once per call rather than once per
+validated value.
+
+Config.override sets values for the current context only (a thread, or an
+asyncio task and whatever it calls), using contextvars, so concurrent requests
+can run with different settings without locking or bleeding into each other.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import collections
+import contextlib
+import contextvars
+import concurrent.futures
+
+
+# default settings, also the fields of a Snapshot
+DEFAULTS = collections.OrderedDict((
+    ("active", True),
+    ("coerce", True),
+    ("debug", False),
+    ("codegen", False),
+    ("sampling", None),
+    ("lazy", False),
+    ("check_returns", False),
+    ("stats", False),
+    ("memoize", False),
+    ("cache_instancechecks", False),
+    ("parallel_threshold", 0),
+    ("executor", None),
+))
+
+# keys which don't take booleans, with a check for their values
+VALUE_CHECKS = {
+    "sampling": lambda value: value is None or callable(value),
+    "parallel_threshold": lambda value: type(value) is int and value >= 0,
+    "executor": lambda value: value is None or isinstance(
+        value, concurrent.futures.Executor),
+}
+
+Snapshot = collections.namedtuple("Snapshot", list(DEFAULTS) + ["version"])
+
+# an _Override for the current context, or None
+_OVERRIDES = contextvars.ContextVar("pychecked_overrides", default=None)
+
+
+class ConfigDict(dict):
+    """Subclass dict to ensure we don't allow additional keys.
+
+    It is still possible, but not through kwargs to the wrap. You could however
+    import this dict somewhere else and call .update() on it to run tests on it
+
+    Any change made through item assignment or update() bumps the version.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(ConfigDict, self).__init__(*args, **kwargs)
+        self.version = 0
+        self._snapshot = None
+
+    def __setitem__(self, key, value):
+        self.check(key, value)
+        dict.__setitem__(self, key, value)
+        self._changed()
+
+    def check(self, key, value):
+        """Raises ValueError if key or value are not allowed."""
+
+        if not key in self:
+            raise ValueError("{} is not a valid config key.".format(key))
+
+        if key in VALUE_CHECKS:
+            is_valid = VALUE_CHECKS[key](value)
+        else:
+            is_valid = isinstance(value, bool)
+
+        if not is_valid:
+            raise ValueError("{} is not a valid config value.".format(value))
+
+    def update(self, *args, **kwargs):
+        dict.update(self, *args, **kwargs)
+        self._changed()
+
+    def snapshot(self):
+        """Returns a Snapshot of the current settings."""
+
+        snapshot = self._snapshot
+        version = self.version
+        if snapshot is None or snapshot.version != version:
+            # the version is read before the values, so a change made while
+            # this is built leaves it stale and it is rebuilt on the next read
+            snapshot = Snapshot(
+                version=version,
+                **{key: self.get(key) for key in DEFAULTS}
+            )
+            self._snapshot = snapshot
+        return snapshot
+
+    def _changed(self):
+        self.version += 1
+        self._snapshot = None
+
+
+class _Override(object):
+    """Config values overridden in a context, laid over the global ones."""
+
+    __slots__ = ("values", "_snapshot")
+
+    def __init__(self, values):
+        self.values = values
+        self._snapshot = None
+
+    def snapshot(self, config):
+        """Returns a Snapshot of config with the overrides applied."""
+
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != config.version:
+            snapshot = config.snapshot()._replace(**self.values)
+            self._snapshot = snapshot
+        return snapshot
+
+
+class Config(object):
+    """The @type_checked static Config object.
+
+    You can access the config dictionary through Config.config(). Typically
+    speaking though, you would pass kwargs to the wrap on the first function
+    your application runs, then from there the settings will be stored.
+
+    Configuration Keys::
+
+        active: boolean to turn all checking on or off
+        coerce: boolean to try to mutate the values into the type requested
+        debug: boolean to print to stderr Value or Type errors that were caught
+        codegen: boolean to generate wrappers specialized to each signature
+        sampling: callable returning if a call should be validated, or None
+                  to validate every call (see pychecked.sampling)
+        lazy: boolean to validate iterators passed for a spec like [int] as
+              they are consumed, instead of reading them into a list
+        check_returns: boolean to validate (and coerce) return values against
+                       their annotation, or each value a generator yields
+        stats: boolean to keep per function metrics, decided when each
+               function is wrapped (see pychecked.metrics)
+        memoize: boolean to cache the results of coercing str, bytes, int
+                 and bool values, per target type (see pychecked.memo)
+        cache_instancechecks: boolean to cache the isinstance checks of
+                              types with a custom __instancecheck__, per
+                              type(value) (see pychecked.instancechecks)
+        parallel_threshold: int, lists of at least this many members are
+                            validated in parallel against a spec like [int],
+                            0 to never (see pychecked.parallel)
+        executor: concurrent.futures.Executor for parallel validation, or
+                  None to use a shared process pool
+    """
+
+    _config = ConfigDict(DEFAULTS)
+
+    @staticmethod
+    def get(key, default=None):
+        """Return the value for a key, including any override in effect."""
+
+        override = _OVERRIDES.get()
+        if override is not None and key in override.values:
+            return override.values[key]
+
+        return Config._config.get(key, default)
+
+    @staticmethod
+    def set(key, value):
+        """Set a value for a key."""
+
+        Config._config[key] = value
+
+    @staticmethod
+    def config():
+        """Returns the static config dictionary object. Mutate at will."""
+
+        return Config._config
+
+    @staticmethod
+    def snapshot():
+        """Returns an immutable Snapshot of the settings in effect.
+
+        The Snapshot is only rebuilt after the config has changed, so this is
+        cheap enough to call once per wrapped function call.
+        """
+
+        override = _OVERRIDES.get()
+        if override is None:
+            return Config._config.snapshot()
+        return override.snapshot(Config._config)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def override(**kwargs):
+        """Context manager to override config values in this context only.
+
+        Other threads and asyncio tasks are not affected, overrides can be
+        nested. Config.set inside of an override still changes the global
+        value, but that will be masked for any key overridden here.
+        """
+
+        for key, value in kwargs.items():
+            Config._config.check(key, value)
+
+        parent = _OVERRIDES.get()
+        if parent is not None:
+            kwargs = dict(parent.values, **kwargs)
+
+        token = _OVERRIDES.set(_Override(kwargs))
+        try:
+            yield
+        finally:
+            _OVERRIDES.reset(token)
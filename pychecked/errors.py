@@ -0,0 +1,189 @@
+"""The error raised when a value doesn't validate.
+
+Formatting the value which failed can cost far more than validating it did,
+a list of millions of ints takes seconds and hundreds of MB to turn into a
+string, and a union trying its members in turn throws most errors away
+unread. So PycheckedTypeError keeps the value and the spec, and only renders
+its message when asked, from a repr bounded in size.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import collections.abc
+import itertools
+import reprlib
+
+
+# the message for a value of the wrong type
+WRONG_TYPE = "{value} is of type {type}, expecting {spec}."
+
+# the message for a value of the wrong length, for a spec like (int, str)
+WRONG_LENGTH = "Argument length mismatch. Expected {spec}."
+
+# longest str() of a value used in a message
+_MAX_LENGTH = 80
+
+_REPR = reprlib.Repr()
+_REPR.maxstring = _MAX_LENGTH
+_REPR.maxother = _MAX_LENGTH
+
+# reprlib bounds these by their number of members
+_CONTAINERS = (list, tuple, dict, set, frozenset)
+
+
+def short_repr(value):
+    """Returns str(value), cut down to a bounded size for error messages.
+
+    Containers are shown with only their first few members, anything else
+    is cut at _MAX_LENGTH characters. Values with more than _MAX_LENGTH
+    members are cut down before they're formatted, so a huge list subclass,
+    deque, bytes or array costs no more than a short one.
+    """
+
+    if type(value) in _CONTAINERS:
+        return _REPR.repr(value)
+
+    members = _head(value)
+    if members is not value:
+        # only the start of value is shown, the rest is never formatted
+        if type(members) in _CONTAINERS:
+            return _REPR.repr(members)
+        return str(members)[:_MAX_LENGTH - 3] + "..."
+
+    text = str(value)
+    if len(text) > _MAX_LENGTH:
+        head = (_MAX_LENGTH - 3) // 2
+        tail = _MAX_LENGTH - 3 - head
+        text = text[:head] + "..." + text[len(text) - tail:]
+    return text
+
+
+def _head(value):
+    """Returns value, or just its first members if it has too many to show."""
+
+    if isinstance(value, str):
+        return value
+
+    try:
+        if len(value) <= _MAX_LENGTH:
+            return value
+        if isinstance(value, collections.abc.Mapping):
+            return dict(itertools.islice(value.items(), _MAX_LENGTH))
+        try:
+            return value[:_MAX_LENGTH]
+        except (TypeError, KeyError):
+            # sized but can't be sliced, eg a deque
+            return list(itertools.islice(value, _MAX_LENGTH))
+    except Exception:  # not sized, or len() and slicing are broken
+        return value
+
+
+class PycheckedTypeError(TypeError):
+    """Raised when a value doesn't validate against its spec.
+
+    The path to the value is filled in as the error passes back out through
+    each container and the argument it was found in. args holds the message
+    alone, str() puts the path in front of it, eg:
+
+        arg 'numlist'[1842][2]: abc is of type str, expecting int.
+
+    Attributes::
+
+        value: the value which failed, not copied
+        spec: the spec value was validated against
+        template: the message format, taking value, type and spec fields
+    """
+
+    def __init__(self, value, spec, template=WRONG_TYPE):
+        super(PycheckedTypeError, self).__init__()
+        self.value = value
+        self.spec = spec
+        self.template = template
+        self._steps = []  # innermost first
+        self._args = None
+
+    def __reduce__(self):
+        return (
+            self.__class__,
+            (self.value, self.spec, self.template),
+            {"_steps": self._steps},
+        )
+
+    def __repr__(self):
+        return "{}({!r})".format(type(self).__name__, str(self))
+
+    def __str__(self):
+        path = self.path
+        if path:
+            return "{}: {}".format(path, self.args[0])
+        return self.args[0]
+
+    @property
+    def args(self):
+        if self._args is None:
+            # imported here, validators raises this error
+            from pychecked.validators import spec_name
+
+            self._args = (self.template.format(
+                value=short_repr(self.value),
+                type=type(self.value).__name__,
+                spec=spec_name(self.spec),
+            ),)
+        return self._args
+
+    @args.setter
+    def args(self, args):
+        self._args = tuple(args)
+
+    @property
+    def path(self):
+        """Where the value was found, eg arg 'numlist'[1842][2], or ""."""
+
+        return "".join(reversed(self._steps))
+
+    def at_index(self, index):
+        """Record that the value was found at index of a list or tuple."""
+
+        self._steps.append("[{}]".format(index))
+
+    def at_key(self, key):
+        """Record that the value was found under key in a dict."""
+
+        self._steps.append("[{}]".format(_REPR.repr(key)))
+
+    def in_key(self, key):
+        """Record that the value was, or was in, the dict key key."""
+
+        self._steps.append("<key {}>".format(_REPR.repr(key)))
+
+    def at_arg(self, name):
+        """Record that the value was passed as the argument name."""
+
+        self._steps.append("arg {!r}".format(name))
@@ -0,0 +1,92 @@
+"""Cached isinstance checks, see the cache_instancechecks Config key.
+
+A metaclass with its own __instancecheck__, like the proxy pattern in the
+README, runs Python code for every isinstance check a TypeValidator makes.
+With the cache_instancechecks Config key on, each TypeValidator for such a
+type remembers the result of the check per type(value), positive or
+negative, so the metaclass is only asked once per type of value.
+
+The cache holds weak references to the types of values, and lives on the
+validator of the target. Call invalidate() when the results of a check may
+have changed, eg after changing what a proxy accepts. Targets whose checks
+depend on the value itself rather than its type must not be cached:
+
+    never_cache(SizedProxy)
+
+ABCs and runtime checkable Protocols are never cached, ABCs already cache
+their own checks and Protocols look at the value.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import abc
+import weakref
+import threading
+
+
+# bumped by invalidate() and never_cache(), cached checks are dropped when
+# they were made at an older version
+version = 0
+
+# targets whose checks are never cached
+_UNCACHED = weakref.WeakSet()
+_LOCK = threading.Lock()
+
+_DEFAULT_CHECKS = (type.__instancecheck__, abc.ABCMeta.__instancecheck__)
+
+
+def has_custom_check(target):
+    """Returns True if target's metaclass has its own __instancecheck__."""
+
+    return type(target).__instancecheck__ not in _DEFAULT_CHECKS and \
+        not getattr(target, "_is_protocol", False)
+
+
+def cacheable(target):
+    """Returns True if the checks of target may be cached."""
+
+    return target not in _UNCACHED
+
+
+def never_cache(target):
+    """Never cache checks against target, its results depend on the value."""
+
+    with _LOCK:
+        _UNCACHED.add(target)
+    invalidate()
+
+
+def invalidate():
+    """Drop every cached check."""
+
+    global version
+
+    with _LOCK:
+        version += 1
@@ -0,0 +1,371 @@
+"""Loads JSON, validating it against a spec while it's being parsed.
+
+json.loads builds the whole document, then validation walks it again and
+copies whatever it coerces. load_json reads the document a chunk at a time
+and validates each value against its part of the spec as soon as it has
+been parsed, so lists and dicts are built once, already validated, and the
+first value which doesn't validate stops the parse (and the reading) there.
+
+The spec is followed down through lists, tuples and dicts. Anything else in
+the spec, eg a type, a custom class or a union, gets the plain JSON value
+below it and validates it as @type_checked would.
+
+Values below the level the spec stops at are parsed by the json module's own
+scanner. The levels above are parsed in python, which is slower than
+json.loads and validating afterwards, so this is for keeping peak memory
+down and for rejecting bad documents cheaply, see the json_ cases of
+bench/run.py.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import io
+import json
+import codecs
+import json.decoder
+import json.scanner
+
+from pychecked.config import Config
+from pychecked.errors import WRONG_LENGTH
+from pychecked.errors import PycheckedTypeError
+from pychecked.validators import compile_spec
+from pychecked.validators import DictValidator
+from pychecked.validators import ForwardValidator
+from pychecked.validators import SequenceValidator
+
+
+# characters (or bytes) to read from a file at a time, at least
+CHUNK_SIZE = 65536
+
+_WHITESPACE = json.decoder.WHITESPACE
+_SPACES = " \t\n\r"
+
+# what can follow a number cut off by the end of the buffer, "" included
+_NUMBER_TAIL = "0123456789.eE+-"
+
+# validators parse() goes into, rather than parsing the value below whole
+_GUIDED = (SequenceValidator, DictValidator, ForwardValidator)
+
+# parses one whole value from a position in a str, in C where available
+_scan = json.scanner.make_scanner(json.JSONDecoder())
+
+
+def load_json(spec, source):
+    """Parse a JSON document, validating it against spec as it's parsed.
+
+    Args::
+
+        spec: the annotation to validate against, eg {str: [int]}
+        source: the document as bytes, a str, or a file object opened in
+                binary or text mode. Bytes are decoded as UTF-8
+
+    Returns:
+        the document, validated (and possibly coerced) against spec
+
+    Raises::
+
+        ValueError on malformed JSON, or incorrect/not-callable spec
+        PycheckedTypeError (a TypeError) at the first value which is not
+        spec and/or cannot be coerced, nothing after it is read
+    """
+
+    validator = compile_spec(spec)
+    settings = Config.snapshot()
+
+    if isinstance(source, str):
+        parser = _Parser(None, source, settings)
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        parser = _Parser(io.BytesIO(source).read, "", settings)
+    else:
+        parser = _Parser(source.read, "", settings)
+
+    value = parser.parse(validator)
+    if parser.peek():
+        parser.fail("Extra data")
+    return value
+
+
+class _Parser(object):
+    """Parses JSON from a buffer which is refilled as it's used up.
+
+    Arrays and objects the spec goes down into are parsed here, a member at
+    a time. Everything else is parsed whole by the json module's scanner,
+    and read into the buffer first if it doesn't all fit.
+
+    Attributes::
+
+        text: the str buffer, from the first character not yet consumed
+        pos: the position of the next character to parse in text
+        offset: the position of text in the whole document
+    """
+
+    __slots__ = ("text", "pos", "offset", "settings", "_read", "_decode")
+
+    def __init__(self, read, text, settings):
+        self.text = text
+        self.pos = 0
+        self.offset = 0
+        self.settings = settings
+        self._read = read
+        self._decode = None
+
+    def fill(self):
+        """Read more of the document into text, returns False at the end.
+
+        Anything before pos is dropped. At least as much is read as is left
+        unparsed, so a value which spans many chunks is rescanned a bounded
+        number of times.
+        """
+
+        if self._read is None:
+            return False
+
+        size = max(CHUNK_SIZE, len(self.text) - self.pos)
+        while True:
+            data = self._read(size)
+            if not isinstance(data, str):
+                if self._decode is None:
+                    self._decode = codecs.getincrementaldecoder(
+                        "utf-8-sig")().decode
+                raw = data
+                data = self._decode(raw, not raw)
+                if raw and not data:  # only part of a character so far
+                    continue
+            break
+
+        if not data:
+            self._read = None
+            return False
+
+        self.offset += self.pos
+        self.text = self.text[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Skip whitespace, returns the next character or "" at the end."""
+
+        text = self.text
+        if self.pos < len(text) and text[self.pos] not in _SPACES:
+            return text[self.pos]
+
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text) or not self.fill():
+                return self.text[self.pos:self.pos + 1]
+
+    def fail(self, message, pos=None):
+        """Raise ValueError for malformed JSON at pos, or the given pos."""
+
+        if pos is None:
+            pos = self.pos
+        raise ValueError("{}: char {}".format(message, self.offset + pos))
+
+    def parse(self, validator):
+        """Parse the next value, validated against validator."""
+
+        if isinstance(validator, ForwardValidator):
+            validator = validator.resolve()
+
+        char = self.peek()
+        if char == "[" and isinstance(validator, SequenceValidator) and \
+           validator.items:
+            return self._sequence(validator)
+        elif char == "{" and isinstance(validator, DictValidator):
+            return self._dict(validator)
+
+        value = self.value()
+        if type(value) is validator.exact_type:
+            return value
+        return validator.validate(value, self.settings)
+
+    def value(self):
+        """Parse the value at pos, which peek() has skipped to, as is."""
+
+        while True:
+            try:
+                value, end = _scan(self.text, self.pos)
+            except StopIteration as error:
+                if not self.fill():
+                    self.fail("Expecting value", error.value)
+            except json.JSONDecodeError as error:
+                # the rest of the value may not have been read yet
+                if not self.fill():
+                    self.fail(error.msg, error.pos)
+            else:
+                # a number cut off by the end of the buffer still parses
+                if self.text[end:end + 1] not in _NUMBER_TAIL or \
+                   not self.fill():
+                    self.pos = end
+                    return value
+
+    def _sequence(self, validator):
+        """Parse an array at pos into a list or tuple, like validator."""
+
+        items = validator.items
+        single = items[0] if len(items) == 1 else None
+        result = []
+
+        self.pos += 1
+        if self.peek() == "]":
+            self.pos += 1
+        elif single is not None and not isinstance(single, _GUIDED):
+            self._members(single, result)
+        else:
+            while True:
+                index = len(result)
+                if single is not None:
+                    item = single
+                elif index < len(items):
+                    item = items[index]
+                else:
+                    raise PycheckedTypeError(
+                        result, validator.spec, WRONG_LENGTH)
+
+                try:
+                    result.append(self.parse(item))
+                except PycheckedTypeError as error:
+                    error.at_index(index)
+                    raise
+
+                if self._end_of("]"):
+                    break
+
+        if len(result) == len(items):
+            factory = type(validator.spec)
+        elif single is not None:
+            factory = list
+        else:
+            raise PycheckedTypeError(result, validator.spec, WRONG_LENGTH)
+
+        if factory is list:
+            return result
+        return factory(result)
+
+    def _members(self, validator, result):
+        """Parse the rest of an array into result, for a spec like [int].
+
+        The same as parse() for each member, for a validator parse() doesn't
+        go into, but with the buffer in locals and the separators skipped
+        inline while a member and what follows it are in the buffer.
+        """
+
+        validate = validator.validate
+        exact = validator.exact_type
+        settings = self.settings
+        append = result.append
+        text = self.text
+        pos = self.pos
+
+        try:
+            while True:
+                try:
+                    member, end = _scan(text, pos)
+                except (StopIteration, ValueError):
+                    end = len(text)
+                if text[end:end + 1] in _NUMBER_TAIL:
+                    # it may go on into the next chunk, or not be valid
+                    self.pos = pos
+                    self.peek()
+                    member = self.value()
+                    text = self.text
+                    end = self.pos
+
+                if type(member) is not exact:
+                    member = validate(member, settings)
+                append(member)
+
+                # the usual "," or ", " between members is skipped here
+                if text[end:end + 1] == ",":
+                    pos = end + 1
+                    if text[pos:pos + 1] == " ":
+                        pos += 1
+                    if text[pos:pos + 1] in _SPACES:
+                        self.pos = pos
+                        self.peek()
+                        text = self.text
+                        pos = self.pos
+                    continue
+
+                self.pos = end
+                if self._end_of("]"):
+                    return
+                text = self.text
+                pos = self.pos
+        except PycheckedTypeError as error:
+            error.at_index(len(result))
+            raise
+
+    def _dict(self, validator):
+        """Parse an object at pos into a dict, like validator."""
+
+        keys = validator.keys.validate
+        values = validator.values
+        settings = self.settings
+        result = type(validator.spec)()
+
+        self.pos += 1
+        if self.peek() == "}":
+            self.pos += 1
+            return result
+
+        while True:
+            if self.peek() != '"':
+                self.fail("Expecting property name enclosed in double quotes")
+            key = self.value()
+            if self.peek() != ":":
+                self.fail("Expecting ':' delimiter")
+            self.pos += 1
+
+            try:
+                checked_key = keys(key, settings)
+            except PycheckedTypeError as error:
+                error.in_key(key)
+                raise
+            try:
+                result[checked_key] = self.parse(values)
+            except PycheckedTypeError as error:
+                error.at_key(key)
+                raise
+
+            if self._end_of("}"):
+                return result
+
+    def _end_of(self, close):
+        """Consume the comma or close after a member, True at close."""
+
+        char = self.peek()
+        if char == close:
+            self.pos += 1
+            return True
+        elif char != ",":
+            self.fail("Expecting ',' delimiter")
+        self.pos += 1
+        return False
@@ -0,0 +1,206 @@
+"""Memo caches for coercion results, see the memoize Config key.
+
+When the same few values are coerced over and over, eg "42" to int or a
+player name to a Player, the result of coercing each str, bytes, int or bool
+value can be cached per target type, so later coercions are a dict lookup.
+Results are shared between every caller which coerces an equal value, so
+targets which are mutable, or whose constructors have side effects, must not
+be cached:
+
+    never_memoize(Connection)
+
+Each target type gets its own bounded LRU cache, with DEFAULT_SIZE entries
+unless memoize() gives it a size or a time to live. Errors aren't cached.
+Caches are cleared whenever a coercion is registered or unregistered.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import time
+import threading
+import collections
+
+from pychecked import coercions
+
+
+DEFAULT_SIZE = 1024
+
+CacheStats = collections.namedtuple(
+    "CacheStats", ("hits", "misses", "evictions", "expired", "size"),
+)
+
+# returned by CoercionCache.get when a key isn't cached
+MISSING = object()
+
+# target type to its CoercionCache
+_CACHES = {}
+
+# target types which are never cached, mutable builtins to start with
+_NEVER = {list, dict, set, bytearray}
+
+# source types which are cached, where equal values always coerce the same.
+# Floats, Decimals and the like don't, eg 0.0 == -0.0 but str() differs
+SOURCES = frozenset((str, bytes, int, bool))
+
+_LOCK = threading.Lock()
+
+
+class CoercionCache(object):
+    """A bounded LRU cache, with an optional time to live per entry.
+
+    Attributes::
+
+        maxsize: the most entries kept, the least recently used go first
+        ttl: seconds an entry is kept for, or None to keep them until evicted
+        hits, misses, evictions, expired: counters since the last clear()
+    """
+
+    def __init__(self, maxsize=DEFAULT_SIZE, ttl=None, clock=time.monotonic):
+        if maxsize < 1:
+            raise ValueError(
+                "maxsize must be at least 1, not {}.".format(maxsize))
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive, not {}.".format(ttl))
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.clear()
+
+    def __repr__(self):
+        return "CoercionCache({}, ttl={})".format(self.maxsize, self.ttl)
+
+    def clear(self):
+        """Drop all of the entries and zero the counters."""
+
+        with self._lock:
+            self._entries = collections.OrderedDict()
+            self._version = coercions.version
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.expired = 0
+
+    def get(self, key):
+        """Returns the value cached for key, or MISSING."""
+
+        if self._version != coercions.version:
+            self.clear()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+
+            value, expires = entry
+            if expires is not None and expires <= self._clock():
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return MISSING
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Cache value for key, evicting the least recently used if full."""
+
+        expires = None if self.ttl is None else self._clock() + self.ttl
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        """Returns the counters and the current size as a CacheStats."""
+
+        with self._lock:
+            return CacheStats(
+                self.hits,
+                self.misses,
+                self.evictions,
+                self.expired,
+                len(self._entries),
+            )
+
+
+def memoize(target, maxsize=DEFAULT_SIZE, ttl=None, clock=time.monotonic):
+    """Size the cache of coercions to target, replacing any existing one.
+
+    Returns:
+        the new CoercionCache for target
+    """
+
+    cache = CoercionCache(maxsize, ttl, clock)
+    with _LOCK:
+        _NEVER.discard(target)
+        _CACHES[target] = cache
+    return cache
+
+
+def never_memoize(target):
+    """Never cache coercions to target, eg if its constructor isn't pure."""
+
+    with _LOCK:
+        _NEVER.add(target)
+        _CACHES.pop(target, None)
+
+
+def cache_for(target):
+    """Returns the CoercionCache for target, or None if it isn't cached."""
+
+    cache = _CACHES.get(target)
+    if cache is None and target not in _NEVER:
+        with _LOCK:
+            if target not in _NEVER:
+                cache = _CACHES.setdefault(target, CoercionCache())
+    return cache
+
+
+def cache_stats():
+    """Returns a dict of target type to the CacheStats of its cache."""
+
+    with _LOCK:
+        caches = list(_CACHES.items())
+    return {target: cache.stats() for target, cache in caches}
+
+
+def clear_caches():
+    """Empty every cache and zero their counters."""
+
+    with _LOCK:
+        caches = list(_CACHES.values())
+    for cache in caches:
+        cache.clear()
@@ -0,0 +1,235 @@
+"""Per-function validation metrics, see the stats Config key.
+
+With the stats Config key on when a function is wrapped, its wrapper counts
+the calls made to it, the calls which were validated, the time spent
+validating arguments, the coercions made by target type and the TypeErrors
+and ValueErrors raised. Functions wrapped with the key off have none of this
+in their wrapper at all.
+
+Counters are kept per function name (the module and qualified name), so
+redefining a function adds to the counters of the one before it. They aren't
+locked, calls from many threads at once can be undercounted.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import time
+import threading
+import contextvars
+import collections
+
+
+Stats = collections.namedtuple(
+    "Stats", ("calls", "validated", "nanoseconds", "coercions", "failures"),
+)
+
+# function name to its FunctionStats
+_REGISTRY = {}
+_REGISTRY_LOCK = threading.Lock()
+
+# the FunctionStats of the call being validated in this context, or None
+_RECORDING = contextvars.ContextVar("pychecked_recording", default=None)
+
+
+class FunctionStats(object):
+    """The counters for one function name.
+
+    Attributes::
+
+        calls: calls made to the wrapper
+        validated: calls which had their arguments validated
+        nanoseconds: total time spent validating arguments and return values
+        coercions: Counter of coercions made, by the name of the target type
+        failures: Counter of errors raised by validation, by exception name
+    """
+
+    __slots__ = ("calls", "validated", "nanoseconds", "coercions", "failures")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Zero all of the counters."""
+
+        self.calls = 0
+        self.validated = 0
+        self.nanoseconds = 0
+        self.coercions = collections.Counter()
+        self.failures = collections.Counter()
+
+    def counting(self, snapshot):
+        """Returns snapshot, wrapped to count a call each time it's called.
+
+        Wrappers take exactly one config snapshot per call, so this counts
+        calls without any code in the wrapper itself.
+        """
+
+        def _snapshot():
+            self.calls += 1
+            return snapshot()
+
+        return _snapshot
+
+    def start(self):
+        """Mark the start of validating a call, returns a token for stop()."""
+
+        self.validated += 1
+        return self.resume()
+
+    def resume(self):
+        """Like start(), for more of a call which start() counted already.
+
+        Eg its return value, validated once the function has returned.
+        """
+
+        return _RECORDING.set(self), time.perf_counter_ns()
+
+    def stop(self, token):
+        """Mark the end of validating a call started with start()."""
+
+        context_token, started = token
+        self.nanoseconds += time.perf_counter_ns() - started
+        _RECORDING.reset(context_token)
+
+    def failed(self, error):
+        """Count error as raised while validating."""
+
+        self.failures[type(error).__name__] += 1
+
+    def snapshot(self):
+        """Returns the counters as a Stats."""
+
+        return Stats(
+            self.calls,
+            self.validated,
+            self.nanoseconds,
+            dict(self.coercions),
+            dict(self.failures),
+        )
+
+
+class InstrumentedPlan(object):
+    """A BindingPlan which records the validation of each bind in stats."""
+
+    __slots__ = ("plan", "record", "returns")
+
+    def __init__(self, plan, record):
+        self.plan = plan
+        self.record = record
+        self.returns = None
+        if plan.returns is not None:
+            self.returns = InstrumentedValidator(plan.returns, record)
+
+    def validators(self):
+        return self.plan.validators()
+
+    def precompile(self):
+        self.plan.precompile()
+
+    def bind(self, args, kwargs, settings):
+        """Validate args and kwargs with the plan, see BindingPlan.bind."""
+
+        record = self.record
+        token = record.start()
+        try:
+            return self.plan.bind(args, kwargs, settings)
+        except (TypeError, ValueError) as error:
+            record.failed(error)
+            raise
+        finally:
+            record.stop(token)
+
+
+class InstrumentedValidator(object):
+    """A Validator which records each value it validates in stats.
+
+    For return values, or the values a generator yields, which are validated
+    as part of a call already counted when its arguments were.
+    """
+
+    __slots__ = ("validator", "record")
+
+    def __init__(self, validator, record):
+        self.validator = validator
+        self.record = record
+
+    def validate(self, value, settings):
+        """Validate value with the validator, see Validator.validate."""
+
+        record = self.record
+        token = record.resume()
+        try:
+            return self.validator.validate(value, settings)
+        except (TypeError, ValueError) as error:
+            record.failed(error)
+            raise
+        finally:
+            record.stop(token)
+
+
+def register(func):
+    """Returns the FunctionStats for func, creating them if needed."""
+
+    name = "{}.{}".format(func.__module__, func.__qualname__)
+    with _REGISTRY_LOCK:
+        record = _REGISTRY.get(name)
+        if record is None:
+            record = _REGISTRY[name] = FunctionStats()
+    return record
+
+
+# returns the FunctionStats being recorded into, or None, so callers can
+# skip working out what to record when nothing is being kept
+recording = _RECORDING.get
+
+
+def coerced(name):
+    """Count a coercion to the type called name, if stats are being kept."""
+
+    record = _RECORDING.get()
+    if record is not None:
+        record.coercions[name] += 1
+
+
+def stats():
+    """Returns a dict of function name to the Stats of each function."""
+
+    with _REGISTRY_LOCK:
+        records = list(_REGISTRY.items())
+    return {name: record.snapshot() for name, record in records}
+
+
+def reset_stats():
+    """Zero the counters of every function."""
+
+    with _REGISTRY_LOCK:
+        records = list(_REGISTRY.values())
+    for record in records:
+        record.reset()
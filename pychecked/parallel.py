@@ -0,0 +1,315 @@
+"""Validating very large containers in parallel.
+
+Above the parallel_threshold Config key, the members of a list validated
+against a spec like [(int, str, str)] are split into chunks which are sent
+to an executor along with the compiled validator, validated there and put
+back together in order.
+
+The executor is the one set as the executor Config key, or a process pool
+made the first time it's needed and reused after. Anything sent to it has to
+be picklable, which is true of the compiled validators and builtin values.
+
+Async wrapped functions can also offload validating their arguments to an
+executor, to keep the event loop free, with bind_in_executor.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import os
+import pickle
+import asyncio
+import weakref
+import functools
+import threading
+import contextvars
+import concurrent.futures
+
+from pychecked.errors import PycheckedTypeError
+
+
+_DEFAULT_EXECUTOR = None
+_DEFAULT_EXECUTOR_LOCK = threading.Lock()
+
+# Validator -> whether it can be sent to another process
+_PICKLES = weakref.WeakKeyDictionary()
+
+# what pickle raises for objects it can't pickle, eg lambdas and locks
+_PICKLING_ERRORS = (pickle.PicklingError, AttributeError, TypeError)
+
+
+def default_executor():
+    """Returns the shared process pool used when no executor is set."""
+
+    global _DEFAULT_EXECUTOR
+
+    with _DEFAULT_EXECUTOR_LOCK:
+        if _DEFAULT_EXECUTOR is None:
+            _DEFAULT_EXECUTOR = concurrent.futures.ProcessPoolExecutor()
+        return _DEFAULT_EXECUTOR
+
+
+def worker_settings(settings):
+    """Returns settings to send to a worker process.
+
+    The workers shouldn't go parallel again, and not everything pickles.
+    """
+
+    return settings._replace(
+        parallel_threshold=0,
+        executor=None,
+        sampling=None,
+    )
+
+
+def is_large(value, threshold):
+    """Returns True if value is a container with threshold or more items."""
+
+    return isinstance(value, (list, tuple, dict, set, frozenset)) and \
+        len(value) >= threshold
+
+
+async def bind_in_executor(plan, args, kwargs, settings, threshold):
+    """Run plan.bind in an executor, from inside of an event loop.
+
+    This uses the executor Config key, or the event loop's default executor
+    (usually a thread pool) if that isn't set. Threads bind in a copy of the
+    caller's context, so coercions are counted in any stats being recorded.
+
+    A process pool is only sent the annotated arguments which are large, as
+    given by threshold, one at a time. The rest are validated here, as are
+    any which can't be pickled. Arguments which were valid already are kept
+    as they were passed, not replaced by the copies the process had.
+
+    Returns:
+        tuple of (list of validated args, dict of validated kwargs)
+    """
+
+    executor = settings.executor
+    if isinstance(executor, concurrent.futures.ProcessPoolExecutor):
+        return await _bind_in_processes(
+            plan, args, kwargs, settings, threshold)
+
+    bind = functools.partial(contextvars.copy_context().run, plan.bind)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, bind, args, kwargs, settings)
+
+
+async def _bind_in_processes(plan, args, kwargs, settings, threshold):
+    """bind_in_executor for a process pool, see there."""
+
+    slots = []
+    for index, arg in enumerate(args):
+        if index < len(plan.positional):
+            validator = plan.positional[index]
+        else:
+            validator = plan.varargs
+        slots.append((index, validator, arg))
+    for kwarg, kwvalue in kwargs.items():
+        validator = plan.keywords.get(kwarg)
+        if validator is None and kwarg not in plan.skip:
+            validator = plan.varkw
+        slots.append((kwarg, validator, kwvalue))
+
+    # every large argument is sent off before any is waited on
+    loop = asyncio.get_running_loop()
+    settings_ = worker_settings(settings)
+    futures = {}
+    for slot, validator, value in slots:
+        if validator is not None and is_large(value, threshold) and \
+           _pickles(validator):
+            futures[slot] = loop.run_in_executor(
+                settings.executor, _validate_value, validator, value,
+                settings_)
+
+    v_args = list(args)
+    try:
+        for slot, validator, value in slots:
+            if validator is None:
+                continue
+
+            try:
+                if slot in futures:
+                    checked = await _offloaded(
+                        futures[slot], validator, value, settings)
+                else:
+                    checked = validator.validate(value, settings)
+            except PycheckedTypeError as error:
+                _at_slot(error, plan, slot)
+                raise
+
+            if isinstance(slot, int):
+                v_args[slot] = checked
+            else:
+                kwargs[slot] = checked
+    finally:
+        for future in futures.values():
+            future.cancel()
+
+    return v_args, kwargs
+
+
+async def _offloaded(future, validator, value, settings):
+    """Returns the result of _validate_value sent to a process as future."""
+
+    try:
+        checked = await future
+    except PycheckedTypeError:
+        raise
+    except _PICKLING_ERRORS:
+        # the value couldn't be sent to the process
+        return validator.validate(value, settings)
+    return value if checked is None else checked
+
+
+def _validate_value(validator, value, settings):
+    """Runs in the executor, returns the validated value or None."""
+
+    checked = validator.validate(value, settings)
+    if checked is value:
+        return None
+    return checked
+
+
+def _at_slot(error, plan, slot):
+    """Adds the argument in slot, a position or keyword, to error's path."""
+
+    if isinstance(slot, int):
+        if slot < len(plan.positional):
+            error.at_arg(plan.names[slot])
+        else:
+            error.at_index(slot - len(plan.positional))
+            error.at_arg(plan.varargs_name)
+    elif slot in plan.keywords:
+        error.at_arg(slot)
+    else:
+        error.at_key(slot)
+        error.at_arg(plan.varkw_name)
+
+
+def validate_chunks(validator, values, settings):
+    """Validate every member of values with validator on an executor.
+
+    Args::
+
+        validator: the compiled Validator for each member
+        values: the list or tuple to validate
+        settings: the config Snapshot to validate with
+
+    A validator, or values, which can't be pickled to send to a process pool
+    are validated here instead, the same as below the parallel_threshold.
+
+    Returns:
+        the list of validated values, or None if nothing changed
+
+    Raises::
+
+        the first error raised validating a member, a PycheckedTypeError has
+        the member's position in values added to its path
+    """
+
+    executor = settings.executor or default_executor()
+    if isinstance(executor, concurrent.futures.ProcessPoolExecutor) and \
+       not _pickles(validator):
+        return _validate_chunk(validator, values, settings, 0)
+    settings_ = worker_settings(settings)
+
+    size = -(-len(values) // ((os.cpu_count() or 1) * 4))
+    size = max(size, 1)
+    futures = [
+        executor.submit(
+            _validate_chunk,
+            validator,
+            values[start:start + size],
+            settings_,
+            start,
+        )
+        for start in range(0, len(values), size)
+    ]
+
+    result = None
+    try:
+        for start, future in zip(range(0, len(values), size), futures):
+            try:
+                changed = future.result()
+            except PycheckedTypeError:
+                raise
+            except _PICKLING_ERRORS:
+                # a value couldn't be sent to the process
+                break
+            if changed is not None:
+                if result is None:
+                    result = list(values)
+                result[start:start + size] = changed
+        else:
+            return result
+    finally:
+        # the chunks after an error aren't needed, or left on the pool
+        for future in futures:
+            future.cancel()
+
+    return _validate_chunk(validator, values, settings, 0)
+
+
+def _pickles(validator):
+    """Returns True if validator can be sent to a process pool."""
+
+    try:
+        return _PICKLES[validator]
+    except KeyError:
+        pass
+
+    try:
+        pickle.dumps(validator)
+    except _PICKLING_ERRORS:
+        pickles = False
+    else:
+        pickles = True
+    _PICKLES[validator] = pickles
+    return pickles
+
+
+def _validate_chunk(validator, values, settings, offset):
+    """Runs in the executor, returns the validated chunk or None."""
+
+    validate = validator.validate
+    result = None
+
+    for index, value in enumerate(values):
+        try:
+            checked = validate(value, settings)
+        except PycheckedTypeError as error:
+            error.at_index(offset + index)
+            raise
+        if checked is not value:
+            if result is None:
+                result = list(values)
+            result[index] = checked
+
+    return result
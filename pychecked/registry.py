@@ -0,0 +1,91 @@
+"""Weak registry of every function wrapped by @type_checked.
+
+Used to reach all of the wrappers at once, eg to precompile them before
+forking, or to turn checking off everywhere with disable_all(). Wrappers are
+removed once nothing else references them.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import weakref
+
+
+_WRAPPERS = weakref.WeakSet()
+
+# True between disable_all() and enable_all()
+disabled = False
+
+
+def add(wrapper):
+    """Register wrapper, returns it, disabled if everything else is."""
+
+    _WRAPPERS.add(wrapper)
+    if disabled:
+        wrapper.disable()
+    return wrapper
+
+
+def wrappers(module=None):
+    """Returns a list of the registered wrappers.
+
+    Args::
+
+        module: only the wrappers of functions from this module, by name
+    """
+
+    return [
+        wrapper for wrapper in list(_WRAPPERS)
+        if module is None or wrapper.__module__ == module
+    ]
+
+
+def disable_all():
+    """Turn off checking in every wrapper, including ones wrapped later.
+
+    The code of each wrapper is swapped for code which calls the wrapped
+    function straight through, without looking at the Config at all. Any
+    reference to a wrapper sees the change, wherever it was imported to.
+    """
+
+    global disabled
+
+    disabled = True
+    for wrapper in wrappers():
+        wrapper.disable()
+
+
+def enable_all():
+    """Turn checking back on in every wrapper, after disable_all()."""
+
+    global disabled
+
+    disabled = False
+    for wrapper in wrappers():
+        wrapper.enable()
@@ -0,0 +1,113 @@
+"""Sampling policies, to only validate some of the calls to a function.
+
+Validating every call of a hot function in production can be too expensive,
+where validating a sample is still enough to detect drift. A policy is any
+callable taking no arguments which returns True when the current call should
+be validated. Calls which aren't sampled go straight to the wrapped function.
+
+Policies can be given per function, with @type_checked(sample=OneIn(100)), or
+for every function without its own policy through the sampling Config key.
+A policy set in the Config is shared, its state counts the calls of all of the
+functions which use it.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import time
+import itertools
+
+
+class OneIn(object):
+    """Validate one in every n calls, starting with the first."""
+
+    def __init__(self, n):
+        if n < 1:
+            raise ValueError("n must be at least 1, not {}.".format(n))
+
+        self.n = n
+        self._calls = itertools.count()
+
+    def __repr__(self):
+        return "OneIn({})".format(self.n)
+
+    def __call__(self):
+        return not next(self._calls) % self.n
+
+
+class FirstThenEvery(object):
+    """Validate the first `first` calls, then one in every `every` after."""
+
+    def __init__(self, first, every):
+        if every < 1:
+            raise ValueError("every must be at least 1, not {}.".format(every))
+
+        self.first = first
+        self.every = every
+        self._calls = itertools.count()
+
+    def __repr__(self):
+        return "FirstThenEvery({}, {})".format(self.first, self.every)
+
+    def __call__(self):
+        call = next(self._calls)
+        return call < self.first or not (call - self.first) % self.every
+
+
+class TokenBucket(object):
+    """Validate at most `rate` calls per second, with bursts up to `burst`.
+
+    The bucket starts full. Tokens are only refilled when a call comes in, so
+    an idle function costs nothing.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be positive, not {}.".format(rate))
+
+        self.rate = rate
+        self.burst = rate if burst is None else burst
+        self._clock = clock
+        self._tokens = self.burst
+        self._last = clock()
+
+    def __repr__(self):
+        return "TokenBucket({}, burst={})".format(self.rate, self.burst)
+
+    def __call__(self):
+        now = self._clock()
+        tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+        if tokens >= 1:
+            self._tokens = tokens - 1
+            return True
+
+        self._tokens = tokens
+        return False
@@ -0,0 +1,165 @@
+"""Do the work left for the first call of each wrapped function up front.
+
+Wrapping a function compiles its annotations, but some work is still left
+for the first call, eg evaluating string annotations. For a pre-fork server
+that means every worker pays for it again, on a live request. Instead, in
+the parent process once the application is imported:
+
+    pychecked.warmup(freeze=True)
+    # then fork the workers
+
+freeze moves everything allocated so far out of reach of the garbage
+collector (see gc.freeze), so its pages stay shared copy-on-write with the
+workers rather than being written to by their first collection.
+
+precompile(module) does the same for the functions of one module, and
+install_import_hook() precompiles each module as soon as it's imported.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import gc
+import sys
+import importlib.abc
+
+from pychecked import registry
+from pychecked.config import Config
+
+
+def precompile(module):
+    """Precompile the wrapped functions of module.
+
+    Args::
+
+        module: the module, or its name
+
+    Returns:
+        the number of functions precompiled
+    """
+
+    name = module if isinstance(module, str) else module.__name__
+    wrappers = registry.wrappers(name)
+    for wrapper in wrappers:
+        wrapper.precompile()
+    return len(wrappers)
+
+
+def warmup(freeze=False):
+    """Precompile every wrapped function.
+
+    Args::
+
+        freeze: also collect and then freeze everything allocated so far with
+                gc.freeze, to call right before forking workers
+
+    Returns:
+        the number of functions precompiled
+    """
+
+    wrappers = registry.wrappers()
+    for wrapper in wrappers:
+        wrapper.precompile()
+    Config.snapshot()
+
+    if freeze:
+        gc.collect()
+        gc.freeze()
+
+    return len(wrappers)
+
+
+class _PrecompileLoader(object):
+    """Wraps a loader to precompile each module after it's executed."""
+
+    def __init__(self, loader):
+        self._loader = loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._loader.exec_module(module)
+        precompile(module)
+
+
+class ImportHook(importlib.abc.MetaPathFinder):
+    """Precompiles the modules found by the rest of sys.meta_path.
+
+    Their loaders are wrapped, to precompile each module once it's executed.
+
+    Attributes::
+
+        prefixes: tuple of module name prefixes to precompile, or empty to
+                  precompile every module
+    """
+
+    def __init__(self, prefixes=()):
+        self.prefixes = tuple(prefixes)
+
+    def find_spec(self, fullname, path, target=None):
+        if self.prefixes and not fullname.startswith(self.prefixes):
+            return None
+
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if hasattr(spec.loader, "exec_module"):
+                    spec.loader = _PrecompileLoader(spec.loader)
+                return spec
+        return None
+
+
+def install_import_hook(prefixes=()):
+    """Precompile each module imported from now on.
+
+    Args::
+
+        prefixes: only precompile modules whose names start with one of
+                  these, eg ("myapp.",), empty for every module
+
+    Returns:
+        the ImportHook, pass it to uninstall_import_hook() to remove it
+    """
+
+    hook = ImportHook(prefixes)
+    sys.meta_path.insert(0, hook)
+    return hook
+
+
+def uninstall_import_hook(hook):
+    """Stop precompiling modules with hook."""
+
+    if hook in sys.meta_path:
+        sys.meta_path.remove(hook)
@@ -39,123 +39,465 @@ OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
 
+import os
 import sys
 import inspect
 import functools
+import itertools
+
+from pychecked import codegen
+from pychecked import metrics
+from pychecked import parallel
+from pychecked import registry
+from pychecked.config import Config
+from pychecked.config import ConfigDict
+from pychecked.errors import PycheckedTypeError
+from pychecked.validators import compile_spec
+from pychecked.validators import walk
+from pychecked.validators import ForwardValidator
+from pychecked.validators import checked_generator
+from pychecked.validators import has_forward_refs
+from pychecked.validators import yielded_spec
+
+
+# with this set in the environment at import, functions aren't wrapped at all
+DISABLED = os.environ.get("PYCHECKED_DISABLE", "") not in ("", "0")
+
+
+class BindingPlan(object):
+    """Precomputed mapping of a function's parameters to their validators.
+
+    Built once when the function is wrapped so the wrapper doesn't need to
+    inspect the signature or the annotations on every call. Slots which are
+    not annotated hold None and are passed straight through.
+
+    Attributes::
+
+        positional: tuple of validators (or None) per positional parameter
+        varargs: the validator for *args, or None
+        keywords: dict of parameter name to validator for named parameters
+        varkw: the validator for **kwargs, or None
+        names: tuple of the names of the positional parameters
+        varargs_name: the name of the *args parameter, or None
+        varkw_name: the name of the **kwargs parameter, or None
+        skip: frozenset of named parameters which are not annotated
+        returns: the validator for the return value, or None. For generator
+                 functions, the validator for each value yielded
+    """
 
+    __slots__ = ("positional", "varargs", "keywords", "varkw", "skip",
+                 "returns", "names", "varargs_name", "varkw_name")
 
-class ConfigDict(dict):
-    """Subclass dict to ensure we don't allow additional keys.
+    def __init__(self, func):
+        annotations = getattr(func, "__annotations__", None) or {}
+        func_sig = inspect.getfullargspec(func)
+        named = func_sig.args + func_sig.kwonlyargs
+
+        def _compile(arg):
+            if arg not in annotations:
+                return None
+            elif _is_forward(annotations[arg]):
+                return ForwardValidator(
+                    annotations[arg], getattr(func, "__globals__", {}))
+            return compile_spec(annotations[arg])
+
+        self.keywords = {
+            arg: _compile(arg) for arg in named if arg in annotations
+        }
+        self.positional = tuple(
+            self.keywords.get(arg) for arg in func_sig.args
+        )
+        self.varargs = _compile(func_sig.varargs)
+        self.varkw = _compile(func_sig.varkw)
+        self.skip = frozenset(arg for arg in named if arg not in annotations)
+        self.names = tuple(func_sig.args)
+        self.varargs_name = func_sig.varargs
+        self.varkw_name = func_sig.varkw
+
+        self.returns = _compile("return")
+        if self.returns is not None and _is_generator_function(func):
+            if _is_forward(annotations["return"]):
+                self.returns = ForwardValidator(
+                    annotations["return"],
+                    getattr(func, "__globals__", {}),
+                    yielded_spec,
+                )
+            else:
+                self.returns = compile_spec(
+                    yielded_spec(annotations["return"]))
 
-    It is still possible, but not through kwargs to the wrap. You could however
-    import this dict somewhere else and call .update() on it to run tests on it
-    """
+    def validators(self):
+        """Yields the validator of each annotated parameter and the return."""
 
-    def __setitem__(self, key, value):
-        if not key in self:
-            raise ValueError("{} is not a valid config key.".format(key))
+        yield from self.keywords.values()
+        for validator in (self.varargs, self.varkw, self.returns):
+            if validator is not None:
+                yield validator
 
-        # might have to define these somewhere should more options come in
-        if isinstance(value, bool):
-            return dict.__setitem__(self, key, value)
-        else:
-            raise ValueError("{} is not a valid config value.".format(value))
+    def precompile(self):
+        """Do any work left for the first call, eg string annotations."""
 
+        for validator in self.validators():
+            for _ in walk(validator):
+                pass
 
-class Config(object):
-    """The @type_checked static Config object.
+    def bind(self, args, kwargs, settings):
+        """Validate the passed args and kwargs against the plan.
 
-    You can access the config dictionary through Config.config(). Typically
-    speaking though, you would pass kwargs to the wrap on the first function
-    your application runs, then from there the settings will be stored.
+        Args::
 
-    Configuration Keys::
+            args: tuple of positional arguments as passed to the wrapper
+            kwargs: dict of keyword arguments, updated in place
+            settings: the config Snapshot to validate with
 
-        coerce: boolean to try to mutate the values into the type requested
-        debug: boolean to print to stderr Value or Type errors that were caught
-    """
-
-    @staticmethod
-    def get(key, default=None):
-        """Return the value for a key."""
+        Returns:
+            tuple of (list of validated args, kwargs)
 
-        return Config.config().get(key, default)
+        Raises::
 
-    @staticmethod
-    def set(key, value):
-        """Set a value for a key."""
+            PycheckedTypeError with the argument added to its path
+        """
 
-        Config.config()[key] = value
+        positional = self.positional
+        v_args = []
+        append = v_args.append
+        try:
+            for validator, arg in zip(positional, args):
+                append(
+                    arg if validator is None
+                    else validator.validate(arg, settings)
+                )
 
-    @staticmethod
-    def config():
-        """Returns the static config dictionary object. Mutate at will."""
+            if len(args) > len(positional):  # the extras are all *args
+                if self.varargs is None:
+                    v_args.extend(args[len(positional):])
+                else:
+                    validate = self.varargs.validate
+                    for arg in args[len(positional):]:
+                        append(validate(arg, settings))
+        except PycheckedTypeError as error:
+            # v_args holds everything before the argument which failed
+            index = len(v_args)
+            if index < len(positional):
+                error.at_arg(self.names[index])
+            else:
+                error.at_index(index - len(positional))
+                error.at_arg(self.varargs_name)
+            raise
 
-        if not hasattr(Config, "_config"):
-            # default settings as kwargs
-            Config._config = ConfigDict(active=True, coerce=True, debug=False)
+        for kwarg, kwvalue in kwargs.items():
+            validator = self.keywords.get(kwarg)
+            if validator is None:
+                if self.varkw is None or kwarg in self.skip:
+                    continue
+                # if this isnt a defined kwarg but **kwargs is annotated
+                validator = self.varkw
+            try:
+                kwargs[kwarg] = validator.validate(kwvalue, settings)
+            except PycheckedTypeError as error:
+                if kwarg not in self.keywords:
+                    error.at_key(kwarg)
+                    kwarg = self.varkw_name
+                error.at_arg(kwarg)
+                raise
 
-        return Config._config
+        return v_args, kwargs
 
 
-def type_checked(func=None, **kwargs):
+def type_checked(func=None, sample=None, offload=None, **kwargs):
     """Wrapper to indicate we want to have the function type checked.
 
+    Coroutine functions and async generator functions get async wrappers, so
+    they're still recognized as such and their results are awaited.
+
+    Decorating a class wraps each of its annotated methods, staticmethods,
+    classmethods and property setters in place, see _type_checked_class.
+
+    Args::
+
+        sample: sampling policy for this function only, a callable returning
+                True when a call should be validated (see pychecked.sampling)
+        offload: for async functions only, if any list, tuple, dict or set
+                 argument has at least this many members, validate the
+                 arguments in the executor Config key (or the event loop's
+                 default executor) rather than in the event loop
+
     KWargs:
         Any of the Config options can be passed at any time as kwargs.
+
+    With PYCHECKED_DISABLE set in the environment when pychecked is first
+    imported, func is returned as it is. See also pychecked.disable_all.
     """
 
     if func is None:
-        return functools.partial(type_checked, **kwargs)
+        return functools.partial(
+            type_checked, sample=sample, offload=offload, **kwargs)
 
-    @functools.wraps(func)
-    def _type_checked(*args, **kwargs):
-        """Go through the function's passed arguments and validate them."""
+    # allows the passing through kwargs to the wrap to adjust config that way
+    for key, value in kwargs.items():
+        Config.set(key, value)
 
-        if not Config.get("active"):
-            # shortcut to facilitate easier performance testing
-            return func(*args, **kwargs)
+    if DISABLED:
+        return func
+    elif isinstance(func, type):
+        return _type_checked_class(func, sample, offload)
+
+    snapshot = Config.snapshot
+    record = None
+    if Config.get("stats"):
+        record = metrics.register(func)
+        snapshot = record.counting(snapshot)
+
+    if Config.get("codegen") and offload is None:
+        generated = _codegen_wrapper(func, snapshot, sample, record)
+        if generated is not None:
+            return generated
+
+    def _make_plan():
+        if record is None:
+            return BindingPlan(func)
+        return metrics.InstrumentedPlan(BindingPlan(func), record)
+
+    plan = _make_plan()
+
+    async def _bind_async(args, kwargs, settings):
+        """Bind in the executor if any of the arguments are large enough."""
+
+        if offload is None or not _is_large(args, kwargs, offload):
+            return plan.bind(args, kwargs, settings)
+        elif record is None:
+            return await parallel.bind_in_executor(
+                plan, args, kwargs, settings, offload)
+
+        # values may be validated in another process, so the stats are
+        # recorded here, around the round trip, and the plain plan is used
+        token = record.start()
+        try:
+            return await parallel.bind_in_executor(
+                plan.plan, args, kwargs, settings, offload)
+        except (TypeError, ValueError) as error:
+            record.failed(error)
+            raise
+        finally:
+            record.stop(token)
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def _type_checked(*args, **kwargs):
+            """Validate the arguments then await the coroutine function."""
+
+            settings = snapshot()
+            if settings.active:
+                sampler = settings.sampling if sample is None else sample
+                if sampler is None or sampler():
+                    args, kwargs = await _bind_async(args, kwargs, settings)
+
+                    if settings.check_returns and plan.returns is not None:
+                        return plan.returns.validate(
+                            await func(*args, **kwargs), settings)
+
+            return await func(*args, **kwargs)
+
+    elif inspect.isasyncgenfunction(func):
+        @functools.wraps(func)
+        async def _type_checked(*args, **kwargs):
+            """Validate the arguments then delegate to the async generator.
+
+            Values sent and exceptions thrown in are passed through to the
+            wrapped async generator.
+            """
+
+            validate = None
+            settings = snapshot()
+            if settings.active:
+                sampler = settings.sampling if sample is None else sample
+                if sampler is None or sampler():
+                    args, kwargs = await _bind_async(args, kwargs, settings)
+                    if settings.check_returns and plan.returns is not None:
+                        validate = plan.returns.validate
+
+            generator = func(*args, **kwargs)
+            try:
+                item = await generator.__anext__()
+                while True:
+                    if validate is not None:
+                        try:
+                            item = validate(item, settings)
+                        except BaseException:
+                            await generator.aclose()
+                            raise
+                    try:
+                        sent = yield item
+                    except GeneratorExit:
+                        await generator.aclose()
+                        raise
+                    except BaseException as error:
+                        item = await generator.athrow(error)
+                    else:
+                        item = await generator.asend(sent)
+            except StopAsyncIteration:
+                return
 
-        v_args = []
-        v_kwargs = {}
+    else:
+        is_generator = _is_generator_function(func)
 
-        annotations = getattr(func, "__annotations__", {})
-        func_sig = inspect.getfullargspec(func)
+        @functools.wraps(func)
+        def _type_checked(*args, **kwargs):
+            """Go through the function's passed arguments and validate them."""
 
-        for i, arg in enumerate(args):
-            try:
-                arg_name = func_sig.args[i]
-            except IndexError:
-                arg_name = func_sig.varargs  # this arg is a *arg
+            settings = snapshot()
+            if not settings.active:
+                # shortcut to facilitate easier performance testing
+                return func(*args, **kwargs)
 
-            if arg_name in annotations:
-                v_args.append(_do_validation(annotations[arg_name], arg))
-            else:
-                v_args.append(arg)
+            sampler = settings.sampling if sample is None else sample
+            if sampler is not None and not sampler():
+                return func(*args, **kwargs)
 
-        for kwarg, kwvalue in kwargs.items():
-            if kwarg in annotations:  # any kwarg may or may not be annotated
-                v_kwargs[kwarg] = _do_validation(annotations[kwarg], kwvalue)
-            elif kwarg not in func_sig.args and func_sig.varkw in annotations:
-                # if this isnt a defined kwarg but **kwargs is annotated
-                v_kwargs[kwarg] = _do_validation(
-                    annotations[func_sig.varkw],
-                    kwvalue,
-                )
+            v_args, v_kwargs = plan.bind(args, kwargs, settings)
+            if not settings.check_returns or plan.returns is None:
+                return func(*v_args, **v_kwargs)
+            elif is_generator:
+                return checked_generator(
+                    func(*v_args, **v_kwargs), plan.returns, settings)
+            return plan.returns.validate(func(*v_args, **v_kwargs), settings)
 
-        kwargs.update(v_kwargs)
-        return func(*v_args, **kwargs)
+    def _rebuild_plan():
+        """Re-read the function's annotations after they've been mutated.
 
-    # allows the passing through kwargs to the wrap to adjust config that way
-    for key, value in kwargs.items():
-        Config.set(key, value)
+        The annotations are only read when the function is wrapped, so any
+        changes to __annotations__ afterwards need this to take effect.
+        """
+
+        nonlocal plan
+        plan = _make_plan()
+
+    def _precompile():
+        """Do any work left for the first call, see pychecked.warmup."""
+
+        plan.precompile()
+
+    checking = _type_checked.__code__
+    unchecked = codegen.passthrough(checking)
+
+    def _disable():
+        """Swap in code which calls func straight through."""
 
-    return _type_checked
+        if unchecked is not None:
+            _type_checked.__code__ = unchecked
+
+    def _enable():
+        """Swap the checking code back in."""
+
+        _type_checked.__code__ = checking
+
+    _type_checked.rebuild_plan = _rebuild_plan
+    _type_checked.precompile = _precompile
+    _type_checked.disable = _disable
+    _type_checked.enable = _enable
+    return registry.add(_type_checked)
+
+
+def _type_checked_class(cls, sample, offload):
+    """Wrap the methods of cls defined in its body, returns cls.
+
+    Functions without any annotations are left as they are, as are ones
+    which are already wrapped. The methods are plain functions either way,
+    so they bind to instances exactly as they did before.
+    """
+
+    def _wrap(func):
+        if getattr(func, "__annotations__", None) and \
+           not hasattr(func, "rebuild_plan"):
+            return type_checked(func, sample=sample, offload=offload)
+        return func
+
+    for name, member in list(vars(cls).items()):
+        if inspect.isfunction(member):
+            wrapped = _wrap(member)
+        elif isinstance(member, (staticmethod, classmethod)):
+            wrapped = type(member)(_wrap(member.__func__))
+        elif isinstance(member, property) and member.fset is not None:
+            wrapped = member.setter(_wrap(member.fset))
+        else:
+            continue
+        setattr(cls, name, wrapped)
+
+    return cls
+
+
+def _is_generator_function(func):
+    return inspect.isgeneratorfunction(func) or \
+        inspect.isasyncgenfunction(func)
+
+
+def _is_forward(annotation):
+    """Returns True if annotation names anything by a string, eg "Node"."""
+
+    return isinstance(annotation, str) or has_forward_refs(annotation)
+
+
+def _is_large(args, kwargs, threshold):
+    """Returns True if any container argument has threshold or more items."""
+
+    for value in itertools.chain(args, kwargs.values()):
+        if parallel.is_large(value, threshold):
+            return True
+    return False
+
+
+def _codegen_wrapper(func, snapshot, sample, record):
+    """Returns a source generated wrapper for func, if it can have one."""
+
+    plan = BindingPlan(func)
+    generated = codegen.generate(func, plan, snapshot, sample, record=record)
+    if generated is None:
+        return None
+
+    functools.update_wrapper(generated, func)
+
+    def _rebuild_plan():
+        """Re-read the function's annotations and regenerate the wrapper."""
+
+        nonlocal plan
+        plan = BindingPlan(func)
+        if registry.disabled:
+            _disable()
+        else:
+            _enable()
+
+    def _precompile():
+        """Do any work left for the first call, see pychecked.warmup."""
+
+        plan.precompile()
+
+    def _disable():
+        """Regenerate the wrapper without any checks."""
+
+        codegen.regenerate(generated, func, codegen.UNCHECKED, snapshot)
+
+    def _enable():
+        """Regenerate the wrapper with its checks."""
+
+        codegen.regenerate(generated, func, plan, snapshot, sample, record)
+
+    generated.rebuild_plan = _rebuild_plan
+    generated.precompile = _precompile
+    generated.disable = _disable
+    generated.enable = _enable
+
+    if Config.get("debug"):
+        print(generated.generated_source, file=sys.stderr)
+
+    return registry.add(generated)
 
 
 def _do_validation(type_, value):
     """Perform the actual type checking validation using settings in Config.
 
+    The spec is compiled (or fetched from the already compiled specs) on each
+    call here, wrapped functions hold on to their compiled validators instead.
+
     Args::
 
         type_: the type or callable to compare value against
@@ -167,102 +509,8 @@ def _do_validation(type_, value):
     Raises::
 
         ValueError on incorrect/not-callable type_ to validate with
-        TypeError when value is not type_ and/or cannot be coerced
+        PycheckedTypeError (a TypeError) when value is not type_ and/or
+        cannot be coerced
     """
 
-    def _raise_error():
-        if hasattr(type_, "__name__"):
-            type_name = type_.__name__
-        elif hasattr(type_, "__iter__"):
-            type_name = "a {} of {}".format(
-                type_.__class__.__name__,
-                ", ".join([subtype.__name__ for subtype in type_]),
-            )
-        else:
-            type_name = type_.__class__.__name__
-
-        raise TypeError("{} is of type {}, expecting {}.".format(
-            value, type(value).__name__, type_name))
-
-    def _log(message):
-        if Config.get("debug"):
-            print(message, file=sys.stderr)
-
-    # need to check for built in syntically defined type first
-    if type_ == []:
-        type_ = list
-    elif type_ == {}:
-        type_ = dict
-
-    # short circut for builtins and metaclasses
-    if isinstance(type_, type):
-        # check for boolean first b/c isinstance(False, int) == True
-        is_bool = isinstance(value, bool)
-        if (is_bool and value is type_) or \
-           (not is_bool and isinstance(value, type_)):
-            return value
-        elif not Config.get("coerce"):
-            # depending how strict you want to be you might want to raise
-            _raise_error()
-
-    if isinstance(type_, dict) and isinstance(value, dict):
-        for key_, value_ in type_.items():
-            key_type = key_
-            value_type = value_
-            break
-        else:
-            # only required to match value to dict, not dict key/values as well
-            return value
-
-        validated_values = {}
-        for key_, value_ in value.items():
-            validated_values[_do_validation(key_type, key_)] = _do_validation(
-                value_type, value_)
-        return type(type_)(validated_values)
-    elif isinstance(type_, (list, tuple)):
-        if not isinstance(value, (list, tuple)):
-            if Config.get("coerce"):
-                if isinstance(value, (str, int, bytes, complex)):
-                    value = [value]
-                else:
-                    try:
-                        value = list(value)
-                    except (ValueError, TypeError) as error:
-                        _log(error)
-                        _raise_error()
-            else:
-                _raise_error()
-        if len(type_) == len(value):
-            validated_values = []
-            for _type, _value in zip(type_, value):
-                validated_values.append(_do_validation(_type, _value))
-            return type(type_)(validated_values)
-        elif len(type_) == 1:  # allows for list of ints, eg `foo:[int]`
-            validated_values = []
-            for val in value:
-                validated_values.append(_do_validation(type_[0], val))
-            return validated_values
-        else:
-            raise TypeError(
-                "Argument length mismatch. Expected a {} of {}.".format(
-                    type_.__class__.__name__,
-                    ", ".join([t.__name__ for t in type_]),
-                ))
-    elif type_ is str and isinstance(value, bytes):
-        return value.decode()
-    elif callable(type_):  # last chance try with callable coercion
-        try:
-            return type_(value)
-        except (ValueError, TypeError) as error:
-            _log(error)
-            # shim in flexability for float->int coercion
-            if type_ is int and Config.get("coerce"):
-                try:
-                    return int(float(value))
-                except (ValueError, TypeError) as error_:
-                    _log(error_)
-            _raise_error()
-    elif type(type_) in [list, tuple]:  # if we make it this far it's an error
-        _raise_error()
-    else:
-        raise ValueError("type {} is not a type or callable.".format(type_))
+    return compile_spec(type_).validate(value, Config.snapshot())
@@ -0,0 +1,988 @@
+"""Compiles annotation specs into reusable trees of validators.
+
+An annotation such as {str: (bool, int, {str: int}, str)} is turned into a
+Validator once, rather than being re-read on every call. Each node of the tree
+only knows how to validate its own level and holds the compiled validators for
+the levels below it.
+
+Structurally identical specs share one compiled validator, so thousands of
+functions annotated with [int] all point at the same object.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import re
+import sys
+import types
+import typing
+import weakref
+import itertools
+import collections.abc
+
+from pychecked import arrays
+from pychecked import coercions
+from pychecked import instancechecks
+from pychecked import memo
+from pychecked import metrics
+from pychecked import parallel
+from pychecked.config import Config
+from pychecked.errors import WRONG_LENGTH
+from pychecked.errors import PycheckedTypeError
+
+
+# spec key -> Validator, entries go away once nothing is using the validator
+_INTERNED = weakref.WeakValueDictionary()
+
+
+def compile_spec(spec):
+    """Compile an annotation into a Validator.
+
+    Args::
+
+        spec: the annotation, a type, callable, (nested) list/tuple/dict or
+              a typing hint, eg Dict[str, List[int]] or Optional[int]
+
+    Returns:
+        a Validator, shared with any other structurally identical spec
+    """
+
+    # need to check for built in syntically defined type first
+    if isinstance(spec, list) and not spec:
+        spec = list
+    elif isinstance(spec, dict) and not spec:
+        spec = dict
+    else:
+        spec = from_typing(spec)
+
+    key = _spec_key(spec)
+    if key is not None:
+        validator = _INTERNED.get(key)
+        if validator is not None:
+            return validator
+
+    if isinstance(spec, type):
+        validator = TypeValidator(spec)
+    elif is_union(spec):
+        validator = UnionValidator(spec)
+    elif typing.get_origin(spec) is typing.Literal:
+        validator = LiteralValidator(spec)
+    elif isinstance(spec, dict):
+        validator = DictValidator(spec)
+    elif isinstance(spec, (list, tuple)):
+        validator = SequenceValidator(spec)
+    elif callable(spec):
+        validator = CallableValidator(spec)
+    else:
+        validator = InvalidValidator(spec)
+
+    if key is not None:
+        _INTERNED[key] = validator
+
+    return validator
+
+
+def _spec_key(spec):
+    """Returns a hashable key describing the structure of spec, or None."""
+
+    if isinstance(spec, list) and not spec:
+        spec = list
+    elif isinstance(spec, dict) and not spec:
+        spec = dict
+    else:
+        spec = from_typing(spec)
+
+    if is_union(spec):
+        # not the Union itself, its equality ignores the order of members
+        children = tuple(_spec_key(arg) for arg in typing.get_args(spec))
+        spec = typing.Union
+    elif isinstance(spec, dict):
+        for key_, value_ in spec.items():
+            children = (_spec_key(key_), _spec_key(value_))
+            break
+    elif isinstance(spec, (list, tuple)):
+        children = tuple(_spec_key(subspec) for subspec in spec)
+    else:
+        try:
+            hash(spec)
+        except TypeError:
+            return None
+        return (type(spec), spec)
+
+    if None in children:
+        return None
+    return (type(spec), children)
+
+
+def from_typing(spec):
+    """Translate a typing hint into the equivalent spec, if it is one.
+
+    List[int] and list[int] become [int], Tuple[int, str] becomes (int, str)
+    and Tuple[int, ...] becomes (int,), Dict[str, int] becomes {str: int},
+    Any becomes object and None, as in -> None, becomes type(None). Unions
+    are left for the UnionValidator, Literals for the LiteralValidator. A
+    TypeVar becomes its bound, the Union of its constraints, or object, and
+    a NewType becomes the type it was made from. Any other generic, eg
+    Set[int] or Iterable[int], is checked against its origin type only, its
+    members are not validated.
+    """
+
+    if spec is typing.Any:
+        return object
+    elif spec is None:
+        return type(None)
+    elif isinstance(spec, typing.TypeVar):
+        return _from_typevar(spec)
+    elif hasattr(spec, "__supertype__"):
+        # a NewType, which is a function before Python 3.10, not a class
+        return from_typing(spec.__supertype__)
+
+    origin = typing.get_origin(spec)
+    if origin is None or is_union(spec):
+        return spec
+
+    args = typing.get_args(spec)
+    if origin is typing.Annotated:
+        return from_typing(args[0])
+    elif origin is typing.Literal:
+        return spec
+    elif not args:
+        return origin
+    elif origin is list:
+        return [args[0]]
+    elif origin is tuple:
+        if len(args) == 2 and args[1] is Ellipsis:
+            return (args[0],)
+        return args
+    elif origin is dict:
+        return {args[0]: args[1]}
+    return origin
+
+
+def _from_typevar(typevar):
+    """Returns the spec a value for typevar can be checked against."""
+
+    if typevar.__bound__ is not None:
+        bound = typevar.__bound__
+    elif typevar.__constraints__:
+        bound = typing.Union[typevar.__constraints__]
+    else:
+        return object
+
+    # a bound given as a string can't be evaluated here
+    if isinstance(bound, typing.ForwardRef):
+        return object
+    return from_typing(bound)
+
+
+def has_forward_refs(spec):
+    """Returns True if a ForwardRef is nested anywhere in spec.
+
+    Eg Optional["Node"] or [List["Node"]], which need the namespace of the
+    function they annotate to be resolved, see ForwardValidator.
+    """
+
+    if isinstance(spec, typing.ForwardRef):
+        return True
+    elif isinstance(spec, dict):
+        return any(has_forward_refs(key_) or has_forward_refs(value_)
+                   for key_, value_ in spec.items())
+    elif isinstance(spec, (list, tuple)):
+        return any(has_forward_refs(subspec) for subspec in spec)
+    return any(has_forward_refs(arg) for arg in typing.get_args(spec))
+
+
+def _resolve_forward_refs(spec, namespace):
+    """Returns spec with each ForwardRef in it evaluated in namespace."""
+
+    if isinstance(spec, typing.ForwardRef):
+        spec = eval(spec.__forward_arg__, namespace)
+        return _resolve_forward_refs(spec, namespace)
+    elif not has_forward_refs(spec):
+        return spec
+    elif isinstance(spec, dict):
+        return type(spec)(
+            (_resolve_forward_refs(key_, namespace),
+             _resolve_forward_refs(value_, namespace))
+            for key_, value_ in spec.items()
+        )
+    elif isinstance(spec, (list, tuple)):
+        return type(spec)(
+            _resolve_forward_refs(subspec, namespace) for subspec in spec)
+
+    args = tuple(
+        # the [int] of Callable[[int], str]
+        [_resolve_forward_refs(arg_, namespace) for arg_ in arg]
+        if isinstance(arg, list) else _resolve_forward_refs(arg, namespace)
+        for arg in typing.get_args(spec)
+    )
+    if is_union(spec):
+        return typing.Union[args]
+    return typing.get_origin(spec)[args]
+
+
+def is_union(spec):
+    """Returns True if spec is a typing.Union, or a union like int | str."""
+
+    return typing.get_origin(spec) in _UNION_ORIGINS
+
+
+# types.UnionType is the origin of int | str, from Python 3.10
+_UNION_ORIGINS = tuple(filter(None, (
+    typing.Union, getattr(types, "UnionType", None),
+)))
+
+
+def walk(validator):
+    """Yields validator and every validator below it, depth first.
+
+    String annotations are evaluated on the way, see ForwardValidator.
+    """
+
+    yield validator
+    for child in validator.children():
+        yield from walk(child)
+
+
+def spec_name(spec):
+    """Returns the human readable name of spec used in error messages."""
+
+    if spec is type(None):
+        return "None"
+    elif is_union(spec):
+        return " or ".join(spec_name(arg) for arg in typing.get_args(spec))
+    elif typing.get_origin(spec) is not None:
+        return repr(spec).replace("typing.", "")
+    elif hasattr(spec, "__name__"):
+        return spec.__name__
+    elif hasattr(spec, "__iter__") and not isinstance(spec, (str, bytes)):
+        return "a {} of {}".format(
+            spec.__class__.__name__,
+            ", ".join([spec_name(subspec) for subspec in spec]),
+        )
+    else:
+        return spec.__class__.__name__
+
+
+def _log(message, settings):
+    if settings.debug:
+        print(message, file=sys.stderr)
+
+
+class Validator(object):
+    """Base class of a compiled annotation spec.
+
+    Subclasses implement validate(value, settings), which returns the value,
+    possibly coerced, or raises PycheckedTypeError (a TypeError) when the
+    value doesn't match. The settings are a config Snapshot, resolved once
+    by the caller and passed down through the tree. Calling the validator
+    directly uses the Snapshot in effect at the time.
+
+    Validators pickle as compile_spec(spec), so they can be sent to other
+    processes as long as the types in their spec can be imported there.
+    """
+
+    __slots__ = ("spec", "__weakref__")
+
+    # the type which can be passed through on a type(value) is check, if any
+    exact_type = None
+
+    def __init__(self, spec):
+        self.spec = spec
+
+    def __repr__(self):
+        return "<{} {}>".format(self.__class__.__name__, spec_name(self.spec))
+
+    def __call__(self, value):
+        return self.validate(value, Config.snapshot())
+
+    def __reduce__(self):
+        # pickled as its spec, with types by qualified name, and compiled
+        # again when loaded, so a process gets the validator it has interned
+        # already if there is one. Caches are left behind, they hold types
+        # which may not be importable elsewhere
+        return compile_spec, (self.spec,)
+
+    def validate(self, value, settings):
+        """Returns value, possibly coerced, or raises TypeError."""
+
+        raise NotImplementedError
+
+    def children(self):
+        """Returns the validators below this one in the tree, if any."""
+
+        return ()
+
+    def takes_type(self, source):
+        """Returns True if values of type source are valid without coercion.
+
+        Only used to pick the member of a union to try first, a value which
+        is of a type taken can still fail validation, eg a list of strs
+        against [int] without coercion.
+        """
+
+        return False
+
+    def _raise_error(self, value):
+        raise PycheckedTypeError(value, self.spec)
+
+
+# strings which int() takes as is, anything else goes through float()
+_INT_STRING = re.compile(r"\s*[+-]?\d+(?:_\d+)*\s*")
+
+# targets where a TypeError coercing a builtin depends only on its type
+_TYPED_FAILURES = frozenset((int, float, complex))
+
+# coercion strategies remembered per TypeValidator before starting over
+_MAX_STRATEGIES = 256
+
+
+def _decode(value):
+    return value.decode()
+
+
+def _str_to_int(value):
+    """Coerce a str to int, without raising first for strings like "3.0"."""
+
+    if _INT_STRING.fullmatch(value):
+        return int(value)
+    return int(float(value))
+
+
+# the strategies for coercions which are known to fail, and for trying
+# whatever works for each value
+_NEVER = object()
+_ANY = object()
+
+
+class TypeValidator(Validator):
+    """Validates against a type, coercing by calling the type.
+
+    How values of each type are coerced is worked out on first sight and
+    remembered: with a converter from pychecked.coercions if one is
+    registered, bytes are decoded to str, strs are parsed to int without
+    raising first for "3.0", and builtins which raised TypeError converting
+    to a number are failed without trying again.
+
+    With the cache_instancechecks Config key on, the isinstance checks of a
+    type with a custom __instancecheck__ are cached per type(value), see
+    pychecked.instancechecks.
+    """
+
+    __slots__ = ("exact_type", "rejects_bool", "custom_check", "_strategies",
+                 "_version", "_checks", "_checks_version")
+
+    def __init__(self, spec):
+        super(TypeValidator, self).__init__(spec)
+        self.exact_type = spec
+        # isinstance(False, int) == True, but we don't want bools to be ints
+        self.rejects_bool = spec is int
+        # type(value) to its coercion strategy, if it has a specific one
+        self._strategies = {}
+        # the coercions registry version the strategies were found with
+        self._version = coercions.version
+        # weakref to type(value) to its cached isinstance check
+        self.custom_check = instancechecks.has_custom_check(spec)
+        self._checks = {}
+        self._checks_version = instancechecks.version
+
+    def takes_type(self, source):
+        try:
+            taken = issubclass(source, self.spec)
+        except TypeError:  # eg Protocols with data members
+            return False
+        return taken and not (self.rejects_bool and issubclass(source, bool))
+
+    def validate(self, value, settings):
+        type_ = self.spec
+        if type(value) is type_:
+            return value
+
+        if self.custom_check and settings.cache_instancechecks:
+            is_instance = self._cached_isinstance(value)
+        else:
+            is_instance = isinstance(value, type_)
+
+        if is_instance and not (self.rejects_bool and isinstance(value, bool)):
+            return value
+        elif not settings.coerce:
+            # depending how strict you want to be you might want to raise
+            self._raise_error(value)
+
+        if settings.memoize:
+            coerced = self._coerce_memoized(value, settings)
+        else:
+            coerced = self._coerce(value, settings)
+        if metrics.recording() is not None:
+            metrics.coerced(type_.__name__)
+        return coerced
+
+    def _cached_isinstance(self, value):
+        checks = self._checks
+        if self._checks_version != instancechecks.version:
+            checks.clear()
+            self._checks_version = instancechecks.version
+
+        source = weakref.ref(type(value))
+        is_instance = checks.get(source)
+        if is_instance is None:
+            is_instance = isinstance(value, self.spec)
+            if instancechecks.cacheable(self.spec):
+                if len(checks) >= _MAX_STRATEGIES:
+                    checks.clear()
+                checks[source] = is_instance
+        return is_instance
+
+    def _coerce_memoized(self, value, settings):
+        """Coerce through the memo cache of the type, for memo.SOURCES."""
+
+        source = type(value)
+        cache = memo.cache_for(self.spec)
+        if cache is None or source not in memo.SOURCES:
+            return self._coerce(value, settings)
+
+        # keyed on the type as well, 1 == True
+        key = (source, value)
+        coerced = cache.get(key)
+
+        if coerced is memo.MISSING:
+            coerced = self._coerce(value, settings)
+            cache.put(key, coerced)
+        return coerced
+
+    def _coerce(self, value, settings):
+        type_ = self.spec
+        source = type(value)
+        if self._version != coercions.version:
+            self._strategies.clear()
+            self._version = coercions.version
+
+        strategy = self._strategies.get(source)
+        if strategy is None:
+            strategy = coercions.find(source, type_)
+            if strategy is None:
+                if type_ is str and issubclass(source, bytes):
+                    strategy = _decode
+                elif type_ is int and source is str:
+                    strategy = _str_to_int
+                else:
+                    strategy = _ANY
+            self._remember(source, strategy)
+
+        if strategy is _ANY:
+            return self._coerce_any(value, settings)
+        elif strategy is _decode:
+            return value.decode()
+        elif strategy is _NEVER:
+            self._raise_error(value)
+
+        try:
+            return strategy(value)
+        except (ValueError, TypeError) as error:
+            _log(error, settings)
+            self._raise_error(value)
+
+    def _coerce_any(self, value, settings):
+        """Coerce by calling the type, or through float() for int."""
+
+        type_ = self.spec
+        try:
+            return type_(value)
+        except (ValueError, TypeError) as error:
+            _log(error, settings)
+            failures = [error]
+
+        # shim in flexability for float->int coercion
+        if type_ is int:
+            try:
+                return int(float(value))
+            except (ValueError, TypeError) as error_:
+                _log(error_, settings)
+                failures.append(error_)
+
+        source = type(value)
+        if type_ in _TYPED_FAILURES and source.__module__ == "builtins" and \
+           all(type(error) is TypeError for error in failures):
+            self._remember(source, _NEVER)
+        self._raise_error(value)
+
+    def _remember(self, source, strategy):
+        if len(self._strategies) >= _MAX_STRATEGIES:
+            self._strategies.clear()
+        self._strategies[source] = strategy
+
+
+class CallableValidator(Validator):
+    """Validates by calling a callable which isn't a type."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, spec):
+        super(CallableValidator, self).__init__(spec)
+        self.name = spec_name(spec)  # for stats, too slow to build per call
+
+    def validate(self, value, settings):
+        try:
+            coerced = self.spec(value)
+        except (ValueError, TypeError) as error:
+            _log(error, settings)
+            self._raise_error(value)
+
+        if coerced is not value and metrics.recording() is not None:
+            metrics.coerced(self.name)
+        return coerced
+
+
+class LiteralValidator(Validator):
+    """Validates a value is one of those of a Literal, eg Literal["r", "w"].
+
+    Values are never coerced, and are compared with their type, so True
+    isn't taken for Literal[1].
+    """
+
+    __slots__ = ("values",)
+
+    def __init__(self, spec):
+        super(LiteralValidator, self).__init__(spec)
+        self.values = frozenset(
+            (type(value), value) for value in typing.get_args(spec)
+        )
+
+    def validate(self, value, settings):
+        try:
+            if (type(value), value) in self.values:
+                return value
+        except TypeError:  # unhashable, so not any of the values
+            pass
+        self._raise_error(value)
+
+
+class InvalidValidator(Validator):
+    """Stands in for a spec which is not a type or callable."""
+
+    __slots__ = ()
+
+    def validate(self, value, settings):
+        raise ValueError("type {} is not a type or callable.".format(
+            self.spec))
+
+
+class ForwardValidator(Validator):
+    """Validates against a string annotation, evaluated on first use.
+
+    Annotations are strings with `from __future__ import annotations`, or
+    when they refer to a class which isn't defined yet. They're evaluated in
+    the namespace of the function, once the first value is validated. One
+    which can't be evaluated yet is tried again the next time it's used.
+
+    The spec can also be a hint with strings nested in it, eg
+    Optional["Node"], which are evaluated the same way.
+
+    convert, if given, is applied to the evaluated spec before compiling it,
+    eg yielded_spec for the return annotation of a generator function.
+    """
+
+    __slots__ = ("namespace", "convert", "_validator")
+
+    def __init__(self, spec, namespace, convert=None):
+        super(ForwardValidator, self).__init__(spec)
+        self.namespace = namespace
+        self.convert = convert
+        self._validator = None
+
+    def __reduce__(self):
+        # the namespace is a module's globals, send what it resolved to
+        return self.resolve().__reduce__()
+
+    def resolve(self):
+        """Returns the validator of the evaluated annotation."""
+
+        validator = self._validator
+        if validator is None:
+            try:
+                spec = self.spec
+                if isinstance(spec, str):
+                    spec = eval(spec, self.namespace)
+                spec = _resolve_forward_refs(spec, self.namespace)
+            except Exception:  # anything at all could be in the string
+                # not kept, the name may only be missing for now, eg while
+                # a circular import is part way through
+                return InvalidValidator(self.spec)
+            if self.convert is not None:
+                spec = self.convert(spec)
+            validator = compile_spec(spec)
+            self._validator = validator
+        return validator
+
+    def children(self):
+        return (self.resolve(),)
+
+    def validate(self, value, settings):
+        return self.resolve().validate(value, settings)
+
+
+class DictValidator(Validator):
+    """Validates the keys and values of a dict, eg {int: str}.
+
+    The dict passed in is returned as is when all of its keys and values were
+    valid already. A new dict is only built once a key or value is coerced.
+    """
+
+    __slots__ = ("keys", "values")
+
+    def __init__(self, spec):
+        super(DictValidator, self).__init__(spec)
+        for key_, value_ in spec.items():
+            self.keys = compile_spec(key_)
+            self.values = compile_spec(value_)
+            break
+
+    def children(self):
+        return (self.keys, self.values)
+
+    def takes_type(self, source):
+        return issubclass(source, dict)
+
+    def validate(self, value, settings):
+        if not isinstance(value, dict):
+            raise ValueError("type {} is not a type or callable.".format(
+                self.spec))
+
+        keys = self.keys.validate
+        values = self.values.validate
+        factory = type(self.spec)
+        result = None
+
+        for index, (key_, value_) in enumerate(value.items()):
+            try:
+                checked_key = keys(key_, settings)
+            except PycheckedTypeError as error:
+                error.in_key(key_)
+                raise
+            try:
+                checked_value = values(value_, settings)
+            except PycheckedTypeError as error:
+                error.at_key(key_)
+                raise
+            if result is not None:
+                result[checked_key] = checked_value
+            elif checked_key is not key_ or checked_value is not value_:
+                # first change, copy over everything valid up to here
+                result = factory(itertools.islice(value.items(), index))
+                result[checked_key] = checked_value
+
+        if result is not None:
+            return result
+        elif type(value) is factory:
+            return value
+        return factory(value)
+
+
+def _validate_each(validates, values, settings, result=None):
+    """Validate values pairwise with validates, copying values on change.
+
+    Args::
+
+        validates: iterable of validate methods, one per value
+        values: the list or tuple to validate
+        settings: the config Snapshot to validate with
+        result: a list to write changes into, if values can't be mutated
+
+    Returns:
+        the list of validated values, or None if nothing changed
+    """
+
+    try:
+        for index, (validate, value) in enumerate(zip(validates, values)):
+            checked = validate(value, settings)
+            if checked is not value:
+                if result is None:
+                    result = list(values)
+                result[index] = checked
+    except PycheckedTypeError as error:
+        error.at_index(index)
+        raise
+    return result
+
+
+class SequenceValidator(Validator):
+    """Validates a list or tuple, either positionally or all of one type.
+
+    A spec with the same length as the value is matched positionally, eg
+    (str, int, bool), and returns the type of the spec. A spec of length one
+    applies to every member, eg [int], and returns a list.
+
+    When nothing needed coercion, the value passed in is returned as is if it
+    is already the type which would be returned. Otherwise a copy is made at
+    the first coerced member.
+
+    Arrays are checked as a whole against a spec of one builtin number type,
+    eg an array.array("d") against [float], see pychecked.arrays.
+
+    With the lazy Config key on, iterators passed for a spec of one type are
+    wrapped in a ValidatingIterator rather than being read into a list.
+
+    Values longer than the parallel_threshold Config key are validated
+    against a spec of one type in parallel, see pychecked.parallel.
+    """
+
+    __slots__ = ("items", "_validates", "_array_type")
+
+    def __init__(self, spec):
+        super(SequenceValidator, self).__init__(spec)
+        self.items = tuple(compile_spec(subspec) for subspec in spec)
+        self._validates = tuple(item.validate for item in self.items)
+
+        self._array_type = None
+        if len(self.items) == 1 and \
+           self.items[0].exact_type in arrays.ARRAY_TYPES:
+            self._array_type = self.items[0].exact_type
+
+    def children(self):
+        return self.items
+
+    def takes_type(self, source):
+        return issubclass(source, (list, tuple))
+
+    def validate(self, value, settings):
+        owned = None  # set when value is our own list, safe to change
+
+        if not isinstance(value, (list, tuple)):
+            if self._array_type is not None:
+                array = arrays.validate_array(
+                    value, self._array_type, settings)
+                if array is not None:
+                    return array
+
+            if settings.lazy and len(self.items) == 1 and \
+               isinstance(value, collections.abc.Iterator):
+                return ValidatingIterator(value, self.items[0], settings)
+
+            if not settings.coerce:
+                self._raise_error(value)
+            elif isinstance(value, (str, int, bytes, complex)):
+                value = [value]
+            else:
+                try:
+                    value = list(value)
+                except (ValueError, TypeError) as error:
+                    _log(error, settings)
+                    self._raise_error(value)
+            owned = value
+
+        items = self.items
+        if len(items) == len(value):
+            factory = type(self.spec)
+            result = _validate_each(
+                self._validates,
+                value,
+                settings,
+                owned if factory is list else None,
+            )
+            if result is None:
+                result = value
+        elif len(items) == 1:  # allows for list of ints, eg `foo:[int]`
+            factory = list
+            threshold = settings.parallel_threshold
+            if threshold and len(value) >= threshold:
+                result = parallel.validate_chunks(items[0], value, settings)
+            else:
+                result = _validate_each(
+                    itertools.repeat(self._validates[0]),
+                    value,
+                    settings,
+                    owned,
+                )
+            if result is None:
+                result = value
+        else:
+            raise PycheckedTypeError(value, self.spec, WRONG_LENGTH)
+
+        if type(result) is factory:
+            return result
+        return factory(result)
+
+
+class UnionValidator(Validator):
+    """Validates against the members of a union, eg Optional[int].
+
+    The member to try first is looked up by type(value), in a table built on
+    first sight of each type from the first member which takes its values as
+    they are. So a value which is already valid costs one dict lookup, no
+    matter how many members there are. Values of a type no member takes, or
+    which fail that member, are tried against the other members in turn,
+    and the first to validate (or coerce) them is used.
+    """
+
+    __slots__ = ("members", "_dispatch")
+
+    def __init__(self, spec):
+        super(UnionValidator, self).__init__(spec)
+        self.members = tuple(
+            compile_spec(arg) for arg in typing.get_args(spec)
+        )
+        # type(value) to the member which takes it, or None
+        self._dispatch = {}
+
+    def children(self):
+        return self.members
+
+    def takes_type(self, source):
+        return self._member_for(source) is not None
+
+    def validate(self, value, settings):
+        source = type(value)
+        try:
+            member = self._dispatch[source]
+        except KeyError:
+            member = self._member_for(source)
+
+        if member is not None:
+            try:
+                return member.validate(value, settings)
+            except (TypeError, ValueError) as error:
+                _log(error, settings)
+
+        for other in self.members:
+            if other is not member:
+                try:
+                    return other.validate(value, settings)
+                except (TypeError, ValueError) as error:
+                    _log(error, settings)
+
+        self._raise_error(value)
+
+    def _member_for(self, source):
+        """Find, and remember, the first member which takes source."""
+
+        for member in self.members:
+            if member.takes_type(source):
+                break
+        else:
+            member = None
+
+        if len(self._dispatch) >= _MAX_STRATEGIES:
+            self._dispatch.clear()
+        self._dispatch[source] = member
+        return member
+
+
+class ValidatingIterator(object):
+    """Validates the members of an iterator as they are consumed.
+
+    A PycheckedTypeError is raised from next() at the first member which
+    doesn't validate, everything before it has already been handed out.
+
+    Attributes::
+
+        index: the number of members handed out so far
+    """
+
+    __slots__ = ("_iterator", "_validate", "_settings", "index")
+
+    def __init__(self, iterator, validator, settings):
+        self._iterator = iterator
+        self._validate = validator.validate
+        self._settings = settings
+        self.index = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        value = next(self._iterator)
+        try:
+            value = self._validate(value, self._settings)
+        except PycheckedTypeError as error:
+            error.at_index(self.index)
+            raise
+        self.index += 1
+        return value
+
+
+# return annotations of generator functions which give the type yielded
+_YIELDING = (
+    collections.abc.Iterable,
+    collections.abc.Iterator,
+    collections.abc.Generator,
+    collections.abc.AsyncIterable,
+    collections.abc.AsyncIterator,
+    collections.abc.AsyncGenerator,
+)
+
+
+def yielded_spec(spec):
+    """Returns the spec for each value yielded, from a return annotation.
+
+    The return annotation of a generator function describes what it yields.
+    Iterator[int], Generator[int, None, None] and the like validate each
+    value against int, as does a spec of one type, eg [int]. Anything else
+    validates each value against the whole spec.
+    """
+
+    if typing.get_origin(spec) in _YIELDING:
+        args = typing.get_args(spec)
+        return args[0] if args else object
+    elif isinstance(spec, type) and spec in _YIELDING:
+        return object
+
+    spec = from_typing(spec)
+    if isinstance(spec, (list, tuple)) and len(spec) == 1:
+        return spec[0]
+    return spec
+
+
+def checked_generator(generator, validator, settings):
+    """Delegates to generator, validating each value it yields.
+
+    Values sent and exceptions thrown in are passed through to generator. A
+    value which doesn't validate closes generator and is raised to the caller,
+    rather than being thrown into generator.
+    """
+
+    validate = validator.validate
+    try:
+        item = next(generator)
+        while True:
+            try:
+                checked = validate(item, settings)
+            except BaseException:
+                generator.close()
+                raise
+            try:
+                sent = yield checked
+            except GeneratorExit:
+                generator.close()
+                raise
+            except BaseException as error:
+                item = generator.throw(error)
+            else:
+                item = generator.send(sent)
+    except StopIteration as stop:
+        return stop.value
@@ -0,0 +1,139 @@
+"""Tests for pychecked's array fast paths.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import array
+import struct
+
+import pytest
+
+from pychecked.type_checking import Config
+from pychecked.type_checking import type_checked
+from pychecked.validators import compile_spec
+
+
+@pytest.fixture
+def numpy():
+    return pytest.importorskip("numpy")
+
+
+@pytest.mark.parametrize(
+    "spec,dtype",
+    ((int, "int32"), (int, "uint8"), (float, "float32"), (bool, "bool")),
+)
+def test_ndarray_passed_through(numpy, spec, dtype):
+    """Arrays with a matching dtype are handed through as is."""
+
+    @type_checked
+    def _run_test(numbers:[spec]):
+        return numbers
+
+    array = numpy.arange(5).astype(dtype)
+    assert _run_test(array) is array
+
+    with Config.override(coerce=False):
+        assert _run_test(array) is array
+
+
+def test_ndarray_coerced(numpy):
+    """Coercion converts the whole array with astype."""
+
+    array = numpy.array([1.5, 2.0, -3.7])
+    result = compile_spec([int])(array)
+    assert isinstance(result, numpy.ndarray)
+    assert result.dtype == numpy.int64
+    assert result.tolist() == [1, 2, -3]
+
+    result = compile_spec([float])(numpy.arange(3))
+    assert result.dtype == numpy.float64
+
+
+def test_ndarray_no_coerce(numpy):
+    """Without coercion, arrays of the wrong dtype raise."""
+
+    with Config.override(coerce=False):
+        with pytest.raises(TypeError):
+            compile_spec([int])(numpy.array([1.5, 2.0]))
+
+
+def test_ndarray_fallback(numpy):
+    """Anything which can't be proven with the dtype is checked per member."""
+
+    with pytest.raises(TypeError):
+        compile_spec([int])(numpy.array([1.0, float("nan")]))
+
+    assert compile_spec([int])(numpy.array([1e30, -1e30])) == [
+        int(1e30), int(-1e30)]
+    assert compile_spec([int])(numpy.array([-2.0 ** 63])).tolist() == [
+        -2 ** 63]
+    assert compile_spec([int])(numpy.array(["1", "2"])) == [1, 2]
+    assert compile_spec([int])(numpy.array([1, "2"], dtype=object)) == [1, 2]
+    assert compile_spec([str])(numpy.arange(2)) == ["0", "1"]
+
+
+@pytest.mark.parametrize(
+    "spec,value",
+    (
+        (float, array.array("d", [1.5, 2.5])),
+        (float, array.array("f", [1.5, 2.5])),
+        (int, array.array("q", [1, 2])),
+        (int, array.array("B", [1, 2])),
+        (int, bytearray(b"abc")),
+        (float, memoryview(array.array("d", [1.5, 2.5]))),
+        (int, memoryview(b"abc")),
+        (bool, memoryview(struct.pack("??", True, False)).cast("?")),
+    ),
+    ids=("double", "float", "long", "byte", "bytearray", "mv-double",
+         "mv-bytes", "mv-bool"),
+)
+def test_buffer_passed_through(spec, value):
+    """Buffers are passed through when their format proves the spec."""
+
+    @type_checked
+    def _run_test(numbers:[spec]):
+        return numbers
+
+    assert _run_test(value) is value
+
+    with Config.override(coerce=False):
+        assert _run_test(value) is value
+
+
+def test_buffer_fallback():
+    """Formats which don't match are validated member by member."""
+
+    assert compile_spec([float])(array.array("i", [1, 2])) == [1.0, 2.0]
+    assert compile_spec([int])(array.array("d", [1.5])) == [1]
+    assert compile_spec([str])(array.array("u", "ab")) == ["a", "b"]
+
+    with Config.override(coerce=False):
+        with pytest.raises(TypeError):
+            compile_spec([float])(array.array("i", [1, 2]))
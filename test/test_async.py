@@ -0,0 +1,268 @@
+"""Tests for pychecked's asyncio support.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import asyncio
+import inspect
+import threading
+import typing
+import concurrent.futures
+
+import pytest
+
+import pychecked
+from pychecked.type_checking import Config
+from pychecked.type_checking import type_checked
+
+
+@pytest.mark.parametrize("codegen", (False, True), ids=("plan", "codegen"))
+def test_coroutine_function(codegen):
+    """Coroutine functions stay coroutine functions, and are awaited."""
+
+    Config.set("codegen", codegen)
+
+    @type_checked
+    async def _run_test(something:int, other:[str]):
+        await asyncio.sleep(0)
+        return something, other
+
+    assert inspect.iscoroutinefunction(_run_test)
+    assert asyncio.run(_run_test("1", [2])) == (1, ["2"])
+
+    with pytest.raises(TypeError):
+        asyncio.run(_run_test("one", []))
+
+
+def test_async_generator_function():
+    """Async generators are delegated to, including asend and athrow."""
+
+    @type_checked
+    async def _run_test(start:int):
+        number = start
+        while True:
+            try:
+                sent = yield number
+            except KeyError:
+                sent = 100
+            number = sent if sent is not None else number + 1
+
+    async def _main():
+        generator = _run_test("1")
+        results = [await generator.__anext__()]
+        results.append(await generator.asend(10))
+        results.append(await generator.__anext__())
+        results.append(await generator.athrow(KeyError))
+        await generator.aclose()
+        return results
+
+    assert inspect.isasyncgenfunction(_run_test)
+    assert asyncio.run(_main()) == [1, 10, 11, 100]
+
+
+def test_async_generator_finishes():
+    """Async generators end when the wrapped one does."""
+
+    @type_checked
+    async def _run_test(count:int):
+        for number in range(count):
+            yield number
+
+    async def _main():
+        return [number async for number in _run_test("3")]
+
+    assert asyncio.run(_main()) == [0, 1, 2]
+
+
+@pytest.mark.parametrize("codegen", (False, True), ids=("plan", "codegen"))
+def test_coroutine_check_returns(codegen):
+    """The awaited result of a coroutine function is validated."""
+
+    Config.set("codegen", codegen)
+
+    @type_checked
+    async def _run_test(something) -> int:
+        return something
+
+    with Config.override(check_returns=True):
+        assert asyncio.run(_run_test("12")) == 12
+
+
+def test_async_generator_check_returns():
+    """Each value an async generator yields is validated."""
+
+    @type_checked
+    async def _run_test(*values) -> [int]:
+        for value in values:
+            yield value
+
+    async def _collect():
+        return [value async for value in _run_test("1", 2.0)]
+
+    with Config.override(check_returns=True):
+        assert asyncio.run(_collect()) == [1, 2]
+
+
+def test_async_generator_check_returns_hints():
+    """AsyncIterator and AsyncGenerator hints give the type yielded."""
+
+    async def _collect(generator):
+        return [value async for value in generator]
+
+    for returns in (typing.AsyncIterator[int],
+                    typing.AsyncGenerator[int, None]):
+        async def _run_test(*values):
+            for value in values:
+                yield value
+
+        _run_test.__annotations__["return"] = returns
+        _run_test = type_checked(_run_test)
+
+        with Config.override(check_returns=True):
+            assert asyncio.run(_collect(_run_test(1, "2"))) == [1, 2]
+
+
+def test_async_generator_check_returns_catching():
+    """A bad value is raised to the caller, and the generator closed."""
+
+    closed = []
+
+    @type_checked
+    async def _run_test() -> [int]:
+        try:
+            for value in (1, "abc", 3):
+                try:
+                    yield value
+                except TypeError:
+                    yield 99
+        finally:
+            closed.append(True)
+
+    async def _collect():
+        return [value async for value in _run_test()]
+
+    with Config.override(check_returns=True):
+        with pytest.raises(TypeError):
+            asyncio.run(_collect())
+
+    assert closed == [True]
+
+
+def test_offload():
+    """Large arguments are validated off of the event loop's thread."""
+
+    threads = []
+
+    def _record(value):
+        threads.append(threading.get_ident())
+        return value
+
+    @type_checked(offload=3)
+    async def _run_test(numbers:[_record]):
+        return threading.get_ident()
+
+    async def _main():
+        loop_thread = threading.get_ident()
+        await _run_test([1, 2])
+        small = set(threads)
+        threads.clear()
+        await _run_test([1, 2, 3])
+        return loop_thread, small, set(threads)
+
+    loop_thread, small, large = asyncio.run(_main())
+    assert small == {loop_thread}
+    assert loop_thread not in large
+
+
+def test_offload_process_pool():
+    """Only large annotated arguments are sent to a process pool."""
+
+    class _Connection(object):
+        def __init__(self):
+            self.lock = threading.Lock()
+
+    @type_checked(offload=3)
+    async def _run_test(conn, rows:[int], small:[int], *more:[int],
+                        **kw:[str]):
+        rows.append(4)
+        return conn, rows, small, more, kw
+
+    @type_checked(offload=3)
+    async def _run_test2(locks:[object]):
+        return locks
+
+    with concurrent.futures.ProcessPoolExecutor(1) as executor:
+        with Config.override(executor=executor):
+            conn = _Connection()
+            rows = [1, 2, 3]
+            result = asyncio.run(
+                _run_test(conn, rows, ["1"], ["2", 3, 4], other=[5, 6, 7]))
+            assert result == (
+                conn, rows, [1], ([2, 3, 4],), {"other": ["5", "6", "7"]})
+            assert result[0] is conn
+            assert result[1] is rows
+            assert rows == [1, 2, 3, 4]
+
+            # unpicklable values are validated in this process
+            locks = [threading.Lock() for _ in range(3)]
+            assert asyncio.run(_run_test2(locks)) is locks
+
+            with pytest.raises(TypeError) as error:
+                asyncio.run(_run_test(conn, [1, 2, 3], [], [1, 2, "x"]))
+            assert error.value.path == "arg 'more'[0][2]"
+
+
+@pytest.mark.parametrize("pool", ("thread", "process"))
+def test_offload_stats(pool):
+    """Stats of offloaded calls are recorded in this process."""
+
+    pychecked.reset_stats()
+    if pool == "thread":
+        executor = concurrent.futures.ThreadPoolExecutor(2)
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(1)
+
+    with executor, Config.override(stats=True, executor=executor):
+        @type_checked(offload=3)
+        async def _run_test(numbers:[int]):
+            return numbers
+
+        assert asyncio.run(_run_test(["1", "2", "3"])) == [1, 2, 3]
+        with pytest.raises(TypeError):
+            asyncio.run(_run_test(["1", "2", "x"]))
+
+    name = "{}.{}".format(_run_test.__module__, _run_test.__qualname__)
+    stats = pychecked.stats()[name]
+    assert stats.calls == 2
+    assert stats.validated == 2
+    assert stats.nanoseconds > 0
+    assert stats.failures == {"PycheckedTypeError": 1}
+    if pool == "thread":
+        assert stats.coercions == {"int": 5}
@@ -0,0 +1,105 @@
+"""Tests for pychecked's bulk validation API.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import pytest
+
+import pychecked
+from pychecked.bulk import Invalid
+from pychecked.type_checking import Config
+
+
+def test_validate():
+    """The same semantics as an annotated argument."""
+
+    assert pychecked.validate({int: [str]}, {"1": [2]}) == {1: ["2"]}
+
+    with pytest.raises(TypeError) as error:
+        pychecked.validate(int, "abc")
+
+    assert "abc is of type str, expecting int." in error.value.args
+
+
+def test_validate_many():
+    """Values are validated lazily, in order."""
+
+    def _rows():
+        yield ("1", "a")
+        yield (2, 3)
+        raise AssertionError("read too far")
+
+    results = pychecked.validate_many((int, str), _rows())
+    assert next(results) == (1, "a")
+    assert next(results) == (2, "3")
+
+
+def test_fail_fast():
+    """By default, the first invalid value raises."""
+
+    results = pychecked.validate_many(int, ["1", "two", "3"])
+    assert next(results) == 1
+    with pytest.raises(TypeError) as error:
+        next(results)
+
+    assert error.value.path == "[1]"
+
+
+def test_collect_errors():
+    """Without fail_fast, invalid values are replaced with Invalids."""
+
+    results = list(pychecked.validate_many(
+        int, ["1", "two", "3"], fail_fast=False))
+
+    assert results[0] == 1
+    assert results[2] == 3
+    assert isinstance(results[1], Invalid)
+    assert results[1].index == 1
+    assert results[1].value == "two"
+    assert isinstance(results[1].error, TypeError)
+
+
+def test_chunked():
+    """Results can be grouped into lists."""
+
+    results = pychecked.validate_many(int, range(5), chunk_size=2)
+    assert list(results) == [[0, 1], [2, 3], [4]]
+
+    with pytest.raises(ValueError):
+        pychecked.validate_many(int, range(5), chunk_size=0)
+
+
+def test_settings_resolved_once():
+    """The config in effect when iteration starts is used throughout."""
+
+    results = pychecked.validate_many(int, ["1", "2"])
+    assert next(results) == 1
+    Config.set("coerce", False)
+    assert next(results) == 2
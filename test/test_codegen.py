@@ -0,0 +1,190 @@
+"""Tests for pychecked's source generated wrappers.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import threading
+
+import pytest
+
+import pychecked
+from pychecked.type_checking import Config
+from pychecked.type_checking import type_checked
+
+
+@pytest.fixture(autouse=True)
+def codegen_on():
+    """Turn on codegen for every test here."""
+
+    Config.set("codegen", True)
+
+
+def test_generated_source():
+    """Annotated types are checked inline, unannotated ones are untouched."""
+
+    @type_checked
+    def _run_test(something:int, other, more:[str]=None): pass
+
+    source = _run_test.generated_source
+    assert "_pychecked_type(something) is not _pychecked_type_0" in source
+    assert "other = " not in source
+    assert "more is not _pychecked_missing" in source
+
+
+def test_signature_shapes():
+    """All parameter kinds are passed through in the right order."""
+
+    @type_checked
+    def _run_test(a:int, b, /, c:str="c", *args:float, d:bool, e=5, **kw:str):
+        return a, b, c, args, d, e, kw
+
+    assert _run_test("1", 2, 3, 4, d=1, f=6) == (
+        1, 2, "3", (4.0,), True, 5, {"f": "6"})
+    assert _run_test(1, 2, d=True) == (1, 2, "c", (), True, 5, {})
+
+
+def test_parameter_named_type():
+    """A parameter can shadow builtins the generated code uses."""
+
+    @type_checked
+    def _run_test(type:str, n:int):
+        return type, n
+
+    assert _run_test("a", "3") == ("a", 3)
+    assert _run_test(type=1, n=2) == ("1", 2)
+
+
+def test_defaults_not_validated():
+    """Defaults are never validated, same as the non-generated wrapper."""
+
+    @type_checked
+    def _run_test(thing:[int]=None):
+        return thing
+
+    assert _run_test() is None
+    assert _run_test("15") == [15]
+
+
+def test_codegen_failure():
+    """Failures still raise the usual TypeError."""
+
+    @type_checked(coerce=False)
+    def _run_test(something:str): pass
+
+    with pytest.raises(TypeError) as error:
+        _run_test(1234)
+
+    assert "1234 is of type int, expecting str." in error.value.args
+
+
+def test_codegen_rebuild():
+    """The wrapper is regenerated in place when annotations change."""
+
+    @type_checked
+    def _run_test(something):
+        return something
+
+    assert _run_test("12") == "12"
+    _run_test.__annotations__["something"] = int
+    _run_test.rebuild_plan()
+
+    assert _run_test("12") == 12
+    assert "_pychecked_type_0" in _run_test.generated_source
+
+
+def test_codegen_inactive():
+    """Deactivating the library skips the generated checks."""
+
+    @type_checked
+    def _run_test(something:int):
+        return something
+
+    Config.set("active", False)
+    assert _run_test("abc") == "abc"
+
+
+def test_codegen_check_returns():
+    """Return checks are generated only for functions with an annotation."""
+
+    @type_checked
+    def _run_test(something) -> int:
+        return something
+
+    @type_checked
+    def _run_test2(something:int):
+        return something
+
+    @type_checked
+    def _run_test3(start) -> [int]:
+        yield start
+
+    assert "check_returns" not in _run_test2.generated_source
+    assert _run_test("12") == "12"
+
+    with Config.override(check_returns=True):
+        assert _run_test("12") == 12
+        assert list(_run_test3("3")) == [3]
+
+
+def test_toggle_while_running():
+    """Other threads can go on calling a wrapper while it's regenerated."""
+
+    @type_checked
+    def _run_test(something:int, other:str="x", more=None, *, last:int=1):
+        return something, other, more, last
+
+    failures = []
+    done = threading.Event()
+
+    def _call():
+        while not done.is_set():
+            try:
+                result = _run_test("1")
+                assert result in (("1", "x", None, 1), (1, "x", None, 1))
+            except BaseException as error:  # any failure at all fails
+                failures.append(error)
+                return
+
+    threads = [threading.Thread(target=_call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        for _ in range(200):
+            pychecked.disable_all()
+            pychecked.enable_all()
+        _run_test.__annotations__["more"] = int
+        _run_test.rebuild_plan()
+    finally:
+        done.set()
+        for thread in threads:
+            thread.join()
+
+    assert failures == []
+    assert _run_test("1", more="2") == (1, "x", 2, 1)
@@ -0,0 +1,121 @@
+"""Tests for pychecked.coercions.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import collections
+
+import pytest
+
+import pychecked
+from pychecked.coercions import unregister_coercion
+from pychecked.type_checking import type_checked
+
+
+class XYObject(object):
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+@pytest.fixture(autouse=True)
+def unregister_coercions():
+    """Remove the coercions registered by the tests here."""
+
+    yield
+    unregister_coercion(tuple, XYObject)
+    unregister_coercion(str, int)
+
+
+def test_register_coercion():
+    """Registered converters are used in place of calling the type."""
+
+    @type_checked
+    def _run_test(point:XYObject):
+        return point
+
+    with pytest.raises(TypeError):
+        _run_test((1, 2))
+
+    pychecked.register_coercion(tuple, XYObject, lambda x_y: XYObject(*x_y))
+    point = _run_test((1, 2))
+    assert (point.x, point.y) == (1, 2)
+
+    # found along the MRO
+    point = _run_test(collections.namedtuple("Pair", "x y")(3, 4))
+    assert (point.x, point.y) == (3, 4)
+
+    # instances aren't converted again
+    assert _run_test(point) is point
+
+    unregister_coercion(tuple, XYObject)
+    with pytest.raises(TypeError):
+        _run_test((1, 2))
+
+
+def test_registered_over_builtin():
+    """Converters take precedence over the built in coercions."""
+
+    @type_checked
+    def _run_test(number:int):
+        return number
+
+    assert _run_test("12") == 12
+
+    pychecked.register_coercion(str, int, lambda value: int(value, 16))
+    assert _run_test("12") == 18
+
+
+def test_converter_errors():
+    """ValueErrors and TypeErrors from converters fail validation."""
+
+    pychecked.register_coercion(tuple, XYObject, lambda x_y: XYObject(*x_y))
+
+    with pytest.raises(TypeError) as error:
+        pychecked.validate(XYObject, (1, 2, 3))
+
+    assert "(1, 2, 3) is of type tuple, expecting XYObject." in \
+        error.value.args
+
+
+@pytest.mark.parametrize(
+    "source, target, converter",
+    (
+        (tuple, XYObject, None),
+        ("tuple", XYObject, tuple),
+        (tuple, [int], list),
+    ),
+    ids=("not callable", "source", "target"),
+)
+def test_register_invalid(source, target, converter):
+    """Only types and callables can be registered."""
+
+    with pytest.raises(ValueError):
+        pychecked.register_coercion(source, target, converter)
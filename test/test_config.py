@@ -0,0 +1,161 @@
+"""Tests for pychecked's Config snapshots and overrides.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import asyncio
+import threading
+
+import pytest
+
+from pychecked.config import DEFAULTS
+from pychecked.config import ConfigDict
+from pychecked.type_checking import Config
+from pychecked.type_checking import type_checked
+
+
+def test_snapshot_cached():
+    """The same snapshot is handed out until the config changes."""
+
+    first = Config.snapshot()
+    assert Config.snapshot() is first
+    assert first.coerce is True
+
+    Config.set("coerce", False)
+    second = Config.snapshot()
+    assert second is not first
+    assert second.version > first.version
+    assert second.coerce is False
+    assert first.coerce is True
+
+
+def test_snapshot_changed_while_built():
+    """A snapshot built across a change isn't served after it."""
+
+    class _Racing(ConfigDict):
+        racing = True
+
+        def get(self, key, default=None):
+            # coerce has been read by the time the last key is
+            if self.racing and key == list(DEFAULTS)[-1]:
+                self.racing = False
+                self["coerce"] = False
+            return super(_Racing, self).get(key, default)
+
+    config = _Racing(DEFAULTS)
+    config.snapshot()
+    assert config.get("coerce") is False
+    assert config.snapshot().coerce is False
+
+
+def test_override():
+    """Overrides apply inside the block and are gone afterwards."""
+
+    @type_checked
+    def _run_test(something:int):
+        return something
+
+    with Config.override(coerce=False):
+        assert Config.get("coerce") is False
+        assert Config.snapshot().coerce is False
+        with pytest.raises(TypeError):
+            _run_test("12")
+
+        with Config.override(active=False):
+            assert Config.snapshot().coerce is False
+            assert _run_test("12") == "12"
+
+    assert Config.get("coerce") is True
+    assert _run_test("12") == 12
+
+
+def test_override_sees_global_changes():
+    """Keys which aren't overridden follow the global config."""
+
+    with Config.override(coerce=False):
+        before = Config.snapshot()
+        Config.set("debug", True)
+        assert Config.snapshot().debug is True
+        assert Config.snapshot().coerce is False
+        assert Config.snapshot() is not before
+
+    Config.set("debug", False)
+
+
+def test_override_invalid():
+    """Overrides are held to the same rules as Config.set."""
+
+    with pytest.raises(ValueError):
+        with Config.override(something_fake=True):
+            pass
+
+    with pytest.raises(ValueError):
+        with Config.override(coerce="yes"):
+            pass
+
+
+def test_override_per_thread():
+    """Other threads don't see an override."""
+
+    seen = []
+
+    with Config.override(coerce=False):
+        thread = threading.Thread(
+            target=lambda: seen.append(Config.snapshot().coerce),
+        )
+        thread.start()
+        thread.join()
+
+    assert seen == [True]
+
+
+def test_override_per_task():
+    """Concurrent asyncio tasks can use different settings."""
+
+    @type_checked
+    def _run_test(something:int):
+        return something
+
+    async def _strict(event):
+        with Config.override(coerce=False):
+            await event.wait()
+            with pytest.raises(TypeError):
+                _run_test("1")
+            return "strict"
+
+    async def _loose(event):
+        event.set()
+        return _run_test("1")
+
+    async def _main():
+        event = asyncio.Event()
+        return await asyncio.gather(_strict(event), _loose(event))
+
+    assert asyncio.run(_main()) == ["strict", 1]
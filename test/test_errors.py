@@ -0,0 +1,195 @@
+"""Tests for pychecked.errors.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import collections
+import pickle
+
+import pytest
+
+import pychecked
+from pychecked.errors import PycheckedTypeError
+from pychecked.type_checking import Config
+from pychecked.type_checking import type_checked
+from pychecked.validators import compile_spec
+
+
+@pytest.fixture(autouse=True)
+def coerce_off():
+    """Turn off coercion for every test here."""
+
+    Config.set("coerce", False)
+
+
+class Loud(object):
+    """Counts how many times it has been turned into a string."""
+
+    strs = 0
+
+    def __str__(self):
+        Loud.strs += 1
+        return "loud"
+
+
+@pytest.mark.parametrize("codegen", (False, True), ids=("plan", "codegen"))
+def test_path(codegen):
+    """The path leads from the argument down to the value which failed."""
+
+    Config.set("codegen", codegen)
+
+    @type_checked
+    def _run_test(first:int, numlist:[[int]]=None, *args:int,
+                  **kwargs:{str: int}):
+        pass
+
+    with pytest.raises(PycheckedTypeError) as error:
+        _run_test(1, [[1, 2, 3]] * 1842 + [[4, 5, "6"]])
+    assert error.value.path == "arg 'numlist'[1842][2]"
+    assert error.value.value == "6"
+    assert str(error.value) == (
+        "arg 'numlist'[1842][2]: 6 is of type str, expecting int.")
+    assert error.value.args == ("6 is of type str, expecting int.",)
+
+    with pytest.raises(PycheckedTypeError) as error:
+        _run_test(1, numlist=[[1], (2, 3.5)])
+    assert error.value.path == "arg 'numlist'[1][1]"
+
+    with pytest.raises(PycheckedTypeError) as error:
+        _run_test(1, [], 2, 3, "4")
+    assert error.value.path == "arg 'args'[2]"
+
+    with pytest.raises(PycheckedTypeError) as error:
+        _run_test(1, extra={"a": 1, "b": "2"})
+    assert error.value.path == "arg 'kwargs'['extra']['b']"
+
+    with pytest.raises(PycheckedTypeError) as error:
+        _run_test(1, extra={1: 1})
+    assert error.value.path == "arg 'kwargs'['extra']<key 1>"
+
+    with pytest.raises(PycheckedTypeError) as error:
+        _run_test("1")
+    assert error.value.path == "arg 'first'"
+
+
+def test_lazy_message():
+    """Nothing is formatted until the message is asked for."""
+
+    Loud.strs = 0
+    validator = compile_spec(int)
+
+    with pytest.raises(PycheckedTypeError) as error:
+        validator(Loud())
+    assert Loud.strs == 0
+
+    assert str(error.value) == "loud is of type Loud, expecting int."
+    assert str(error.value) == "loud is of type Loud, expecting int."
+    assert Loud.strs == 1
+
+
+def test_bounded_message():
+    """Huge values are cut down in the message."""
+
+    values = list(range(5000000))
+    validator = compile_spec([str])
+
+    with pytest.raises(PycheckedTypeError) as error:
+        validator((values,))
+    message = error.value.args[0]
+    assert message == (
+        "[0, 1, 2, 3, 4, 5, ...] is of type list, expecting str."
+    )
+    assert error.value.value is values
+
+    with pytest.raises(PycheckedTypeError) as error:
+        compile_spec(int)("x" * 10000)
+    assert len(error.value.args[0]) < 200
+
+
+class Numbers(list):
+    """A list subclass, which reprlib doesn't know to cut down."""
+
+
+@pytest.mark.parametrize(
+    "value",
+    (
+        Numbers(range(3000000)),
+        collections.deque(range(3000000)),
+        bytes(3000000),
+    ),
+    ids=("list-subclass", "deque", "bytes"),
+)
+def test_bounded_message_any_value(value):
+    """Values reprlib doesn't bound are cut down before they're formatted."""
+
+    with pytest.raises(PycheckedTypeError) as error:
+        compile_spec(int)(value)
+    assert len(error.value.args[0]) < 200
+    assert error.value.value is value
+
+
+def test_repr():
+    """repr() shows the message, not an empty argument list."""
+
+    with pytest.raises(PycheckedTypeError) as error:
+        compile_spec([int])([1, "2"])
+    assert repr(error.value) == (
+        "PycheckedTypeError('[1]: 2 is of type str, expecting int.')")
+
+
+def test_dict_value():
+    """Values in a dict are found by their key."""
+
+    validator = compile_spec({str: int})
+    with pytest.raises(PycheckedTypeError) as error:
+        validator({"a": [1]})
+    assert str(error.value) == (
+        "['a']: [1] is of type list, expecting int.")
+
+
+def test_pickle():
+    """Errors keep their path through pickling, eg back from a process."""
+
+    with pytest.raises(PycheckedTypeError) as error:
+        compile_spec([int])([1, "2"])
+
+    copied = pickle.loads(pickle.dumps(error.value))
+    assert copied.value == "2"
+    assert copied.spec is int
+    assert str(copied) == str(error.value)
+
+
+def test_is_type_error():
+    """Code catching TypeError keeps working."""
+
+    with pytest.raises(TypeError):
+        pychecked.validate(int, "abc")
+
+    assert pychecked.PycheckedTypeError is PycheckedTypeError
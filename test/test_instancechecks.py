@@ -0,0 +1,131 @@
+"""Tests for pychecked.instancechecks.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import collections.abc
+
+import pytest
+
+from pychecked.instancechecks import invalidate
+from pychecked.instancechecks import never_cache
+from pychecked.type_checking import Config
+from pychecked.validators import TypeValidator
+
+
+class XYObject(object):
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+class XYObjectProxyMeta(type):
+    checks = 0
+
+    def __instancecheck__(cls, instance):
+        XYObjectProxyMeta.checks += 1
+        return instance.__class__.__name__ in ["XYObjectProxy", "XYObject"]
+
+
+class XYObjectProxy(XYObject, metaclass=XYObjectProxyMeta):
+    def __init__(self, arg):
+        super(XYObjectProxy, self).__init__(*arg)
+
+
+@pytest.fixture(autouse=True)
+def cache_instancechecks():
+    """Turn on cache_instancechecks for every test here."""
+
+    Config.set("cache_instancechecks", True)
+    XYObjectProxyMeta.checks = 0
+    invalidate()
+
+
+def test_cached():
+    """The metaclass is asked once per type of value, either way."""
+
+    validator = TypeValidator(XYObjectProxy)
+    assert validator.custom_check
+
+    point = XYObject(1, 2)
+    for _ in range(3):
+        assert validator(point) is point
+        assert validator((1, 2)).x == 1
+
+    assert XYObjectProxyMeta.checks == 2
+
+
+def test_not_cached():
+    """Checks are made every time with the Config key off."""
+
+    validator = TypeValidator(XYObjectProxy)
+    point = XYObject(1, 2)
+    with Config.override(cache_instancechecks=False):
+        validator(point)
+        validator(point)
+
+    assert XYObjectProxyMeta.checks == 2
+
+
+def test_invalidate():
+    """Invalidating drops the cached checks."""
+
+    validator = TypeValidator(XYObjectProxy)
+    point = XYObject(1, 2)
+    validator(point)
+    invalidate()
+    validator(point)
+
+    assert XYObjectProxyMeta.checks == 2
+
+
+def test_never_cache():
+    """Targets can opt out of the cache."""
+
+    class ValueProxy(XYObjectProxy):
+        pass
+
+    never_cache(ValueProxy)
+    validator = TypeValidator(ValueProxy)
+    point = XYObject(1, 2)
+    validator(point)
+    validator(point)
+
+    assert XYObjectProxyMeta.checks == 2
+
+
+@pytest.mark.parametrize(
+    "target", (int, XYObject, collections.abc.Iterable),
+    ids=("builtin", "class", "abc"),
+)
+def test_default_checks(target):
+    """Only types with a custom __instancecheck__ use the cache."""
+
+    assert not TypeValidator(target).custom_check
@@ -0,0 +1,156 @@
+"""Tests for pychecked.jsonstream.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import io
+import json
+
+import pytest
+
+import pychecked
+from pychecked.errors import PycheckedTypeError
+from pychecked.jsonstream import load_json
+from pychecked.type_checking import Config
+
+
+DOCUMENT = (
+    '{"a": [1, 2.5e3, -0.5, "x\\u00e9\\n", true, false, null],'
+    ' "b" : {}, "c":[ ], "d": {"e": [[]]}, "f": "\\ud83d\\ude00 ü",'
+    ' "g": [NaN, Infinity, -Infinity, 12345678901234567890]}'
+)
+
+
+class Point(object):
+    def __init__(self, x_y):
+        self.x, self.y = x_y
+
+
+class CountingReader(io.BytesIO):
+    """Counts the bytes read from it."""
+
+    def __init__(self, data):
+        super(CountingReader, self).__init__(data)
+        self.read_bytes = 0
+
+    def read(self, size=-1):
+        data = super(CountingReader, self).read(size)
+        self.read_bytes += len(data)
+        return data
+
+
+@pytest.fixture(params=(1, 3, 65536), ids=("1", "3", "default"))
+def chunk_size(request, monkeypatch):
+    """Read files a few characters at a time, to split every token."""
+
+    monkeypatch.setitem(load_json.__globals__, "CHUNK_SIZE", request.param)
+    return request.param
+
+
+@pytest.mark.parametrize("source", (
+    lambda text: text,
+    lambda text: text.encode("utf-8"),
+    lambda text: memoryview(text.encode("utf-8")),
+    lambda text: io.StringIO(text),
+    lambda text: io.BytesIO(text.encode("utf-8")),
+), ids=("str", "bytes", "memoryview", "text file", "binary file"))
+def test_same_as_json(chunk_size, source):
+    """Without a spec to follow, the document is loaded as json does."""
+
+    expected = json.loads(DOCUMENT)
+    for spec in (object, {str: object}):
+        loaded = load_json(spec, source(DOCUMENT))
+        assert repr(loaded) == repr(expected)
+
+
+def test_validated(chunk_size):
+    """Values are validated, and coerced, as they would be as arguments."""
+
+    document = b'{"1": [[1, 2], ["3", 4.0]], "2" : [ ] }'
+    assert load_json({int: [(str, int)]}, io.BytesIO(document)) == {
+        1: [("1", 2), ("3", 4)],
+        2: [],
+    }
+
+    points = load_json([Point], io.BytesIO(b'[[1, 2], [3, 4]]'))
+    assert [(point.x, point.y) for point in points] == [(1, 2), (3, 4)]
+
+    assert load_json([float], '[1, 2.5, "3"]') == [1.0, 2.5, 3.0]
+    assert load_json((int,), '[1]') == (1,)
+    assert load_json((int,), '[1, 2]') == [1, 2]
+    assert load_json(str, '12') == "12"
+
+
+@pytest.mark.parametrize("document, spec, path", (
+    ('{"a": [1, 2, "x"]}', {str: [int]}, "['a'][2]"),
+    ('{"a": 1}', {int: int}, "<key 'a'>"),
+    ('[[1, 2], [1, 2, 3]]', [(int, int)], "[1]"),
+    ('[[1, 2], [1]]', [(int, int)], "[1]"),
+    ('[1.5, "abc"]', [float], "[1]"),
+    ('{"a": {"b": [null]}}', {str: {str: [int]}}, "['a']['b'][0]"),
+))
+def test_failure_path(chunk_size, document, spec, path):
+    """The error says where in the document the value was."""
+
+    with Config.override(coerce=False):
+        with pytest.raises(PycheckedTypeError) as error:
+            load_json(spec, io.BytesIO(document.encode("utf-8")))
+
+    assert error.value.path == path
+
+
+def test_stops_early():
+    """Nothing after the first value to fail is read."""
+
+    data = json.dumps(["zero"] + list(range(100000))).encode("utf-8")
+    reader = CountingReader(data)
+
+    with pytest.raises(TypeError):
+        load_json([int], reader)
+
+    assert reader.read_bytes < len(data) / 2
+
+
+@pytest.mark.parametrize("document", (
+    "", "[", "[1,]", "[1 2]", '{"a" 1}', "{1: 2}", '"abc', '"\\x"', "nul",
+    "-", "[1] x", "[,1]", "01",
+))
+def test_malformed(chunk_size, document):
+    """Anything json.loads rejects raises ValueError."""
+
+    for spec in (object, [int]):
+        with pytest.raises(ValueError):
+            load_json(spec, io.BytesIO(document.encode("utf-8")))
+
+
+def test_exposed():
+    """load_json is reachable from the package."""
+
+    assert pychecked.load_json({str: int}, b'{"a": "1"}') == {"a": 1}
@@ -0,0 +1,189 @@
+"""Tests for pychecked.memo.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import pytest
+
+import pychecked
+from pychecked.coercions import unregister_coercion
+from pychecked.memo import cache_for
+from pychecked.memo import CoercionCache
+from pychecked.memo import MISSING
+from pychecked.type_checking import Config
+from pychecked.type_checking import type_checked
+
+
+class Player(object):
+    created = 0
+
+    def __init__(self, name):
+        Player.created += 1
+        self.name = name
+
+
+@pytest.fixture(autouse=True)
+def memoize_players():
+    """Turn on memoize for every test here."""
+
+    Config.set("memoize", True)
+    Player.created = 0
+    pychecked.memoize(Player)
+
+
+def test_memoized():
+    """Equal hashable values are only coerced once."""
+
+    @type_checked
+    def _run_test(player:Player, number:int):
+        return player, number
+
+    first = _run_test("paul", "42")
+    second = _run_test("paul", "42")
+    assert first[0] is second[0]
+    assert first[1] == 42
+    assert Player.created == 1
+
+    stats = cache_for(Player).stats()
+    assert (stats.hits, stats.misses, stats.size) == (1, 1, 1)
+
+
+def test_not_memoized():
+    """Memoize is off by default, unhashable values are never cached."""
+
+    @type_checked
+    def _run_test(player:Player):
+        return player
+
+    _run_test(["paul"])
+    _run_test(["paul"])
+    assert Player.created == 2
+
+    with Config.override(memoize=False):
+        _run_test("paul")
+        _run_test("paul")
+    assert Player.created == 4
+
+
+def test_keyed_by_type():
+    """Equal values of different types are cached separately."""
+
+    @type_checked
+    def _run_test(something:str):
+        return something
+
+    assert _run_test(1) == "1"
+    assert _run_test(True) == "True"
+    assert _run_test(1.0) == "1.0"
+
+
+def test_equal_floats_not_memoized():
+    """Floats which are equal but coerce differently aren't cached."""
+
+    @type_checked
+    def _run_test(something:str):
+        return something
+
+    assert _run_test(0.0) == "0.0"
+    assert _run_test(-0.0) == "-0.0"
+
+
+def test_never_memoize():
+    """Targets can be marked as not to be cached, lists are by default."""
+
+    pychecked.never_memoize(Player)
+    assert cache_for(Player) is None
+    assert cache_for(list) is None
+
+    @type_checked
+    def _run_test(player:Player, names:list):
+        return player, names
+
+    first = _run_test("paul", ("paul",))
+    second = _run_test("paul", ("paul",))
+    assert first[0] is not second[0]
+    assert first[1] is not second[1]
+
+
+def test_cleared_by_register_coercion():
+    """Registering a coercion drops results cached from before it."""
+
+    @type_checked
+    def _run_test(player:Player):
+        return player
+
+    assert _run_test("paul").name == "paul"
+
+    pychecked.register_coercion(str, Player, lambda name: Player(name * 2))
+    try:
+        assert _run_test("paul").name == "paulpaul"
+    finally:
+        unregister_coercion(str, Player)
+
+
+def test_lru_eviction():
+    """The least recently used entries are evicted first."""
+
+    cache = CoercionCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats().evictions == 1
+
+
+def test_ttl():
+    """Entries expire after their time to live."""
+
+    now = [0.0]
+    cache = CoercionCache(ttl=10, clock=lambda: now[0])
+    cache.put("a", 1)
+
+    now[0] = 9.9
+    assert cache.get("a") == 1
+    now[0] = 10.0
+    assert cache.get("a") is MISSING
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.expired) == (1, 1, 1)
+
+
+@pytest.mark.parametrize(
+    "kwargs", ({"maxsize": 0}, {"ttl": 0}), ids=("maxsize", "ttl"),
+)
+def test_invalid_cache(kwargs):
+    """Caches need room for an entry and a positive time to live."""
+
+    with pytest.raises(ValueError):
+        CoercionCache(**kwargs)
@@ -0,0 +1,158 @@
+"""Tests for pychecked.metrics.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import typing
+
+import pytest
+
+import pychecked
+from pychecked.type_checking import Config
+from pychecked.type_checking import type_checked
+
+
+@pytest.fixture(autouse=True)
+def keep_stats():
+    """Keep stats for the functions wrapped in each test."""
+
+    Config.set("stats", True)
+    pychecked.reset_stats()
+
+
+def _stats_for(func):
+    name = "{}.{}".format(func.__module__, func.__qualname__)
+    return pychecked.stats()[name]
+
+
+@pytest.mark.parametrize("codegen", (False, True), ids=("plan", "codegen"))
+def test_stats(codegen):
+    """Calls, validated calls, coercions and failures are all counted."""
+
+    Config.set("codegen", codegen)
+
+    @type_checked
+    def _run_test(something:int, other:[str]=None, size:abs=0):
+        pass
+
+    _run_test(1)
+    _run_test("2", other=[3, "4"], size=-5)
+    with pytest.raises(TypeError):
+        _run_test("abc")
+
+    stats = _stats_for(_run_test)
+    assert stats.calls == 3
+    assert stats.validated == 3
+    assert stats.nanoseconds > 0
+    assert stats.coercions == {"int": 1, "str": 1, "abs": 1}
+    assert stats.failures == {"PycheckedTypeError": 1}
+
+    pychecked.reset_stats()
+    assert _stats_for(_run_test).calls == 0
+
+
+@pytest.mark.parametrize("codegen", (False, True), ids=("plan", "codegen"))
+def test_stats_returns(codegen):
+    """Validating return values is recorded as part of the call."""
+
+    Config.config().update({"codegen": codegen, "check_returns": True})
+
+    @type_checked
+    def _run_test(something) -> int:
+        return something
+
+    @type_checked
+    def _run_test2(something) -> typing.Iterator[int]:
+        yield something
+
+    try:
+        assert _run_test("5") == 5
+        with pytest.raises(TypeError):
+            _run_test("abc")
+        assert list(_run_test2("6")) == [6]
+    finally:
+        Config.set("check_returns", False)
+
+    stats = _stats_for(_run_test)
+    assert stats.calls == 2
+    assert stats.validated == 2
+    assert stats.nanoseconds > 0
+    assert stats.coercions == {"int": 1}
+    assert stats.failures == {"PycheckedTypeError": 1}
+    assert _stats_for(_run_test2).coercions == {"int": 1}
+
+
+@pytest.mark.parametrize("codegen", (False, True), ids=("plan", "codegen"))
+def test_stats_unannotated(codegen):
+    """Calls to functions without annotations are counted too."""
+
+    Config.set("codegen", codegen)
+
+    @type_checked
+    def _run_test(something):
+        return something
+
+    for value in range(3):
+        assert _run_test(value) == value
+
+    stats = _stats_for(_run_test)
+    assert stats.calls == 3
+    assert stats.validated == 3
+
+
+def test_stats_unvalidated_calls():
+    """Calls which aren't validated are counted, but not as validated."""
+
+    @type_checked
+    def _run_test(something:int):
+        pass
+
+    _run_test(1)
+    with Config.override(active=False):
+        _run_test(2)
+
+    stats = _stats_for(_run_test)
+    assert stats.calls == 2
+    assert stats.validated == 1
+
+
+@pytest.mark.parametrize("codegen", (False, True), ids=("plan", "codegen"))
+def test_stats_off(codegen):
+    """Functions wrapped with stats off are never registered."""
+
+    Config.config().update({"stats": False, "codegen": codegen})
+
+    @type_checked
+    def _run_test(something:int):
+        pass
+
+    _run_test("1")
+    assert "{}.{}".format(__name__, _run_test.__qualname__) not in \
+        pychecked.stats()
@@ -0,0 +1,140 @@
+"""Tests for pychecked's parallel validation of large containers.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import time
+import threading
+import concurrent.futures
+
+import pytest
+
+from pychecked.type_checking import Config
+from pychecked.type_checking import type_checked
+from pychecked.validators import compile_spec
+
+
+@pytest.fixture(params=("thread", "process"))
+def executor(request):
+    if request.param == "thread":
+        pool = concurrent.futures.ThreadPoolExecutor(4)
+    else:
+        pool = concurrent.futures.ProcessPoolExecutor(2)
+
+    with pool:
+        Config.set("executor", pool)
+        Config.set("parallel_threshold", 100)
+        yield pool
+
+
+def test_parallel_unchanged(executor):
+    """Nothing is copied when every member was valid."""
+
+    @type_checked
+    def _run_test(rows:[(int, str, str)]):
+        return rows
+
+    rows = [(number, "a", "b") for number in range(1000)]
+    assert _run_test(rows) is rows
+
+
+def test_parallel_coerced(executor):
+    """Coerced members come back in their original positions."""
+
+    rows = [(number, "a", "b") for number in range(1000)]
+    rows[10] = ("10", "a", 1)
+    rows[999] = (999.0, b"a", "b")
+
+    result = compile_spec([(int, str, str)])(rows)
+    assert result[10] == (10, "a", "1")
+    assert result[999] == (999, "a", "b")
+    assert result[:10] == rows[:10]
+    assert len(result) == 1000
+    assert rows[10] == ("10", "a", 1)
+
+
+def test_parallel_error_index(executor):
+    """Errors report the index in the whole container, not the chunk."""
+
+    rows = list(range(1000))
+    rows[567] = "five hundred"
+
+    with pytest.raises(TypeError) as error:
+        compile_spec([int])(rows)
+
+    assert error.value.path == "[567]"
+
+
+def test_parallel_error_cancels():
+    """The chunks still waiting for the pool are dropped after an error."""
+
+    seen = []
+
+    def _slow(value):
+        seen.append(value)
+        if value == 0:
+            raise ValueError(value)
+        time.sleep(0.001)
+        return value
+
+    with concurrent.futures.ThreadPoolExecutor(1) as pool:
+        with Config.override(executor=pool, parallel_threshold=100):
+            with pytest.raises(TypeError):
+                compile_spec([_slow])(list(range(1000)))
+
+    assert len(seen) < 500
+
+
+def test_parallel_unpicklable(executor):
+    """Validators and values which can't be pickled are checked in process."""
+
+    rows = [str(value) for value in range(1000)]
+    assert compile_spec([lambda value: int(value)])(rows) == list(range(1000))
+
+    rows = [threading.Lock() for _ in range(1000)]
+    assert compile_spec([object])(rows) is rows
+
+
+def test_below_threshold():
+    """Small containers are validated in process, without an executor."""
+
+    Config.set("parallel_threshold", 10)
+    assert compile_spec([int])(["1", "2"]) == [1, 2]
+
+
+def test_parallel_config():
+    """The parallel keys are checked like every other."""
+
+    for value in (-1, True, "10"):
+        with pytest.raises(ValueError):
+            Config.set("parallel_threshold", value)
+
+    with pytest.raises(ValueError):
+        Config.set("executor", object())
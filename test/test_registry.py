@@ -0,0 +1,129 @@
+"""Tests for pychecked.registry.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import os
+import sys
+import asyncio
+import subprocess
+
+import pytest
+
+import pychecked
+from pychecked.type_checking import Config
+from pychecked.type_checking import type_checked
+
+
+@pytest.mark.parametrize("codegen", (False, True), ids=("plan", "codegen"))
+def test_disable_all(codegen):
+    """Disabled wrappers call straight through, and can be enabled again."""
+
+    with Config.override(codegen=codegen):
+        @type_checked
+        def _run_test(something:int, other:str="x", *args, **kwargs):
+            return something, other, args, kwargs
+
+    pychecked.disable_all()
+    assert _run_test("1") == ("1", "x", (), {})
+    assert _run_test("1", 2, 3, four=4) == ("1", 2, (3,), {"four": 4})
+
+    pychecked.enable_all()
+    assert _run_test("1") == (1, "x", (), {})
+
+
+def test_disable_all_shared():
+    """Wrappers of the same shape share a passthrough but keep their func."""
+
+    def _make(result):
+        @type_checked
+        def _run_test(something:int):
+            return result, something
+        return _run_test
+
+    first, second = _make(1), _make(2)
+    pychecked.disable_all()
+    assert first("1") == (1, "1")
+    assert second("1") == (2, "1")
+    assert first.__code__ is second.__code__
+
+    pychecked.enable_all()
+    assert first("1") == (1, 1)
+
+
+def test_disable_all_async():
+    """Async wrappers stay async when they're disabled."""
+
+    @type_checked
+    async def _run_test(something:int):
+        return something
+
+    @type_checked
+    async def _run_test2(something:int):
+        sent = yield something
+        yield sent
+
+    async def _run_both():
+        generator = _run_test2("2")
+        first = await generator.__anext__()
+        return await _run_test("1"), first, await generator.asend("3")
+
+    pychecked.disable_all()
+    assert asyncio.run(_run_both()) == ("1", "2", "3")
+
+    pychecked.enable_all()
+    assert asyncio.run(_run_both()) == (1, 2, "3")
+
+
+def test_wrapped_while_disabled():
+    """Functions wrapped after disable_all start out disabled."""
+
+    pychecked.disable_all()
+
+    @type_checked
+    def _run_test(something:int):
+        return something
+
+    assert _run_test("1") == "1"
+    pychecked.enable_all()
+    assert _run_test("1") == 1
+
+
+def test_environment_variable():
+    """Functions aren't wrapped at all with PYCHECKED_DISABLE set."""
+
+    script = "\n".join([
+        "import pychecked",
+        "def run(something:int): pass",
+        "assert pychecked(run) is run",
+    ])
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYCHECKED_DISABLE="1", PYTHONPATH=root)
+    subprocess.check_call([sys.executable, "-c", script], env=env)
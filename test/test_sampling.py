@@ -0,0 +1,128 @@
+"""Tests for pychecked's sampling policies.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import pytest
+
+from pychecked.sampling import FirstThenEvery
+from pychecked.sampling import OneIn
+from pychecked.sampling import TokenBucket
+from pychecked.type_checking import Config
+from pychecked.type_checking import type_checked
+
+
+def test_submodule_import():
+    """Submodules can be imported from the package once it is replaced."""
+
+    from pychecked import sampling
+
+    assert sampling.OneIn is OneIn
+
+
+def test_one_in():
+    """Every nth call is sampled, starting with the first."""
+
+    policy = OneIn(3)
+    assert [policy() for _ in range(7)] == [
+        True, False, False, True, False, False, True]
+
+
+def test_first_then_every():
+    """The first calls are all sampled, then every nth."""
+
+    policy = FirstThenEvery(2, 3)
+    assert [policy() for _ in range(8)] == [
+        True, True, True, False, False, True, False, False]
+
+
+def test_token_bucket():
+    """Tokens refill at the rate given, up to the burst size."""
+
+    now = [0.0]
+    policy = TokenBucket(2, burst=2, clock=lambda: now[0])
+    assert [policy() for _ in range(3)] == [True, True, False]
+
+    now[0] = 0.5
+    assert [policy() for _ in range(2)] == [True, False]
+
+    now[0] = 100
+    assert [policy() for _ in range(3)] == [True, True, False]
+
+
+def test_bad_policies():
+    """Policies which can never sample are refused."""
+
+    with pytest.raises(ValueError):
+        OneIn(0)
+
+    with pytest.raises(ValueError):
+        FirstThenEvery(1, 0)
+
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+    with pytest.raises(ValueError):
+        Config.set("sampling", 10)
+
+
+@pytest.mark.parametrize("codegen", (False, True), ids=("plan", "codegen"))
+def test_function_sampling(codegen):
+    """Calls which aren't sampled are passed through untouched."""
+
+    Config.set("codegen", codegen)
+
+    @type_checked(sample=OneIn(2))
+    def _run_test(something:int):
+        return something
+
+    assert [_run_test("1") for _ in range(4)] == [1, "1", 1, "1"]
+
+
+@pytest.mark.parametrize("codegen", (False, True), ids=("plan", "codegen"))
+def test_global_sampling(codegen):
+    """The Config policy applies to functions without their own."""
+
+    Config.set("codegen", codegen)
+
+    @type_checked
+    def _run_test(something:int):
+        return something
+
+    @type_checked(sample=lambda: True)
+    def _run_test2(something:int):
+        return something
+
+    Config.set("sampling", OneIn(2))
+    assert [_run_test("1") for _ in range(4)] == [1, "1", 1, "1"]
+    assert [_run_test2("1") for _ in range(2)] == [1, 1]
+
+    Config.set("sampling", None)
+    assert [_run_test("1") for _ in range(2)] == [1, 1]
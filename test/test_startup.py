@@ -0,0 +1,157 @@
+"""Tests for pychecked.startup.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import gc
+import sys
+import textwrap
+
+import pytest
+
+import pychecked
+from pychecked.type_checking import Config
+from pychecked.type_checking import type_checked
+
+
+RESOLVED = []
+
+
+def _resolve_int():
+    """Stands in for a type in string annotations, counting evaluations."""
+
+    RESOLVED.append(True)
+    return int
+
+
+@pytest.fixture(autouse=True)
+def clear_resolved():
+    """Forget the annotations resolved by earlier tests."""
+
+    del RESOLVED[:]
+
+
+@pytest.mark.parametrize("codegen", (False, True), ids=("plan", "codegen"))
+def test_precompile(codegen):
+    """String annotations are evaluated by precompile, not the first call."""
+
+    with Config.override(codegen=codegen):
+        @type_checked
+        def _run_test(something:"_resolve_int()") -> "_resolve_int()":
+            return something
+
+    assert not RESOLVED
+    assert pychecked.precompile(sys.modules[__name__]) >= 1
+    assert len(RESOLVED) == 2
+
+    assert _run_test("1") == 1
+    assert len(RESOLVED) == 2
+
+
+def test_warmup():
+    """Every wrapped function is precompiled by warmup."""
+
+    @type_checked
+    def _run_test(something:"_resolve_int()"):
+        return something
+
+    try:
+        assert pychecked.warmup(freeze=True) >= 1
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
+
+    assert RESOLVED == [True]
+
+
+def test_import_hook(tmp_path, monkeypatch):
+    """Modules are precompiled as they're imported with the hook."""
+
+    (tmp_path / "pychecked_hooked.py").write_text(textwrap.dedent("""
+        import pychecked
+
+        RESOLVED = []
+
+        def _resolve_int():
+            RESOLVED.append(True)
+            return int
+
+        @pychecked
+        def run(something:"_resolve_int()"):
+            return something
+    """))
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    hook = pychecked.install_import_hook(prefixes=("pychecked_hooked",))
+    try:
+        import pychecked_hooked
+    finally:
+        pychecked.uninstall_import_hook(hook)
+        sys.modules.pop("pychecked_hooked", None)
+
+    assert pychecked_hooked.RESOLVED == [True]
+    assert pychecked_hooked.run("2") == 2
+
+
+def test_import_hook_cycle(tmp_path, monkeypatch):
+    """Annotations naming what a circular import hasn't defined yet work."""
+
+    package = tmp_path / "pychecked_cycle"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "a.py").write_text(textwrap.dedent("""
+        from pychecked_cycle import b
+
+        class Thing(object):
+            def __init__(self, value):
+                self.value = value
+    """))
+    (package / "b.py").write_text(textwrap.dedent("""
+        import pychecked
+        from pychecked_cycle import a
+
+        @pychecked
+        def use(thing:"a.Thing"):
+            return thing
+    """))
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    hook = pychecked.install_import_hook(prefixes=("pychecked_cycle",))
+    try:
+        from pychecked_cycle import a
+        from pychecked_cycle import b
+    finally:
+        pychecked.uninstall_import_hook(hook)
+        for name in ("pychecked_cycle", "pychecked_cycle.a",
+                     "pychecked_cycle.b"):
+            sys.modules.pop(name, None)
+
+    assert b.use(5).value == 5
+    assert isinstance(b.use(a.Thing(6)), a.Thing)
@@ -31,6 +31,8 @@ OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 
 import sys
+import typing
+import collections.abc
 import pytest
 
 from pychecked.type_checking import Config
@@ -273,7 +275,8 @@ def test_nested_fail():
         _run_test(12)
 
     assert error.exconly() == (
-        "TypeError: Argument length mismatch. Expected a tuple of float, float."
+        "pychecked.errors.PycheckedTypeError: arg 'thing': "
+        "Argument length mismatch. Expected a tuple of float, float."
     )
 
 
@@ -287,8 +290,8 @@ def test_nested_one_arg_short():
         _run_test(("123", 123.12))
 
     assert error.exconly() == (
-        "TypeError: Argument length mismatch. "
-        "Expected a tuple of float, int, str."
+        "pychecked.errors.PycheckedTypeError: arg 'thing': "
+        "Argument length mismatch. Expected a tuple of float, int, str."
     )
 
 
@@ -418,7 +421,8 @@ def test_multi_arg_object():
         _run_test((1, 2))
 
     assert error.exconly() == (
-        "TypeError: (1, 2) is of type tuple, expecting MyObject."
+        "pychecked.errors.PycheckedTypeError: "
+        "arg 'ok': (1, 2) is of type tuple, expecting MyObject."
     )
 
 
@@ -527,5 +531,190 @@ def test_complex_to_tuple():
     _run_test(complex(15, 2))
 
 
+def test_unannotated_kwonly_not_star_kwargs():
+    """Unannotated keyword only args shouldn't pick up the **kwargs spec."""
+
+    @type_checked
+    def _run_test(*args, plain, **kwargs:int):
+        assert plain == "15"
+        assert kwargs == {"other": 15}
+
+    _run_test(plain="15", other="15")
+
+
+def test_rebuild_plan():
+    """Annotations are read once, rebuild_plan picks up any changes."""
+
+    @type_checked
+    def _run_test(something):
+        return something
+
+    assert _run_test("12") == "12"
+
+    _run_test.__annotations__["something"] = int
+    assert _run_test("12") == "12"
+
+    _run_test.rebuild_plan()
+    assert _run_test("12") == 12
+
+
+def test_check_returns():
+    """Return values are only validated with the check_returns Config key."""
+
+    @type_checked
+    def _run_test(something) -> int:
+        return something
+
+    assert _run_test("12") == "12"
+
+    with Config.override(check_returns=True):
+        assert _run_test("12") == 12
+
+        with pytest.raises(TypeError):
+            _run_test("abc")
+
+
+@pytest.mark.parametrize("codegen", (False, True), ids=("plan", "codegen"))
+def test_check_returns_none(codegen):
+    """-> None checks the function returns None."""
+
+    with Config.override(codegen=codegen):
+        @type_checked
+        def _run_test(something) -> None:
+            if something:
+                return something
+
+    with Config.override(check_returns=True):
+        assert _run_test(None) is None
+        with pytest.raises(TypeError):
+            _run_test("abc")
+
+
+def test_check_returns_generator():
+    """Generators have each yielded value validated, sends pass through."""
+
+    @type_checked
+    def _run_test(start) -> [int]:
+        value = start
+        while value != "stop":
+            value = yield value
+        return "done"
+
+    with Config.override(check_returns=True):
+        generator = _run_test("1")
+        assert next(generator) == 1
+        assert generator.send(2.5) == 2
+
+        with pytest.raises(TypeError):
+            generator.send("abc")
+
+        generator = _run_test("1")
+        next(generator)
+        with pytest.raises(StopIteration) as stop:
+            generator.send("stop")
+        assert stop.value.value == "done"
+
+
+@pytest.mark.parametrize("codegen", (False, True), ids=("plan", "codegen"))
+@pytest.mark.parametrize("returns", (
+    typing.Iterator[int],
+    typing.Iterable[int],
+    typing.Generator[int, None, None],
+    collections.abc.Iterator[int],
+    "typing.Iterator[int]",
+), ids=("Iterator", "Iterable", "Generator", "abc", "string"))
+def test_check_returns_generator_hints(codegen, returns):
+    """Generator hints validate each value against the type yielded."""
+
+    def _run_test(*values):
+        yield from values
+
+    _run_test.__annotations__["return"] = returns
+    with Config.override(codegen=codegen):
+        _run_test = type_checked(_run_test)
+
+    with Config.override(check_returns=True):
+        assert list(_run_test(1, "2", 3.0)) == [1, 2, 3]
+        with pytest.raises(TypeError):
+            list(_run_test(1, "abc"))
+
+
+@pytest.mark.parametrize("codegen", (False, True), ids=("plan", "codegen"))
+def test_check_returns_generator_catching(codegen):
+    """A bad value is raised to the caller, not into the generator."""
+
+    closed = []
+
+    with Config.override(codegen=codegen):
+        @type_checked
+        def _run_test() -> [int]:
+            try:
+                for value in (1, "abc", 3):
+                    try:
+                        yield value
+                    except TypeError:
+                        yield 99
+            finally:
+                closed.append(True)
+
+    with Config.override(check_returns=True):
+        generator = _run_test()
+        assert next(generator) == 1
+        with pytest.raises(TypeError):
+            next(generator)
+
+    assert closed == [True]
+
+
+@pytest.mark.parametrize("codegen", (False, True), ids=("plan", "codegen"))
+def test_class(codegen):
+    """Decorating a class wraps its methods, but not self or cls."""
+
+    with Config.override(codegen=codegen):
+        @type_checked
+        class _TestClass(object):
+            def __init__(self, value:int):
+                self._value = value
+
+            def add(self, other:int):
+                return self._value + other
+
+            @staticmethod
+            def static(value:int):
+                return value
+
+            @classmethod
+            def build(cls, value:str):
+                return cls(value)
+
+            @property
+            def value(self):
+                return self._value
+
+            @value.setter
+            def value(self, value:int):
+                self._value = value
+
+            def plain(self, value):
+                return value
+
+    instance = _TestClass("1")
+    assert instance.add("2") == 3
+    assert instance.static("3") == 3
+    assert _TestClass.static("3") == 3
+    assert _TestClass.build("4").value == 4
+    assert instance.plain("5") == "5"
+
+    instance.value = "6"
+    assert instance.value == 6
+
+    with pytest.raises(TypeError):
+        instance.add("abc")
+
+    assert _TestClass.plain.__name__ == "plain"
+    assert not hasattr(_TestClass.plain, "rebuild_plan")
+    assert _TestClass.add.__qualname__.endswith("_TestClass.add")
+
+
 if __name__ == "__main__":
     pytest.main("-rx -v {}".format(__file__))
@@ -0,0 +1,228 @@
+"""Tests for typing hints as specs.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import pickle
+import typing
+
+import pytest
+
+from pychecked.type_checking import Config
+from pychecked.type_checking import type_checked
+from pychecked.validators import compile_spec
+from pychecked.validators import UnionValidator
+
+
+@pytest.mark.parametrize(
+    "hint, spec",
+    (
+        (typing.List[int], [int]),
+        (list[int], [int]),
+        (typing.Tuple[int, str], (int, str)),
+        (tuple[int, ...], (int,)),
+        (typing.Dict[str, int], {str: int}),
+        (dict[str, typing.List[int]], {str: [int]}),
+        (typing.List, list),
+        (typing.Any, object),
+        (typing.Set[int], set),
+        (typing.Annotated[int, "meta"], int),
+        (typing.Annotated[typing.List[int], "meta"], [int]),
+        (typing.TypeVar("T"), object),
+        (typing.TypeVar("B", bound=typing.List[int]), [int]),
+        (typing.TypeVar("C", int, str), typing.Union[int, str]),
+        (typing.NewType("UserId", int), int),
+    ),
+    ids=("List", "list", "Tuple", "tuple ...", "Dict", "nested", "bare",
+         "Any", "Set", "Annotated", "Annotated generic", "TypeVar",
+         "TypeVar bound", "TypeVar constraints", "NewType"),
+)
+def test_generics(hint, spec):
+    """Generics compile to the same validators as the equivalent spec."""
+
+    assert compile_spec(hint) is compile_spec(spec)
+
+
+def test_typing_hints():
+    """Hints from typing can be used in annotations."""
+
+    @type_checked
+    def _run_test(names:typing.List[str], counts:dict[str, int],
+                  maybe:typing.Optional[int]=None):
+        return names, counts, maybe
+
+    assert _run_test((1, 2), {1: "2"}, "3") == (["1", "2"], {"1": 2}, 3)
+    assert _run_test([], {}, None) == ([], {}, None)
+
+
+def test_typevar():
+    """Functions taking a TypeVar check values against what it can be."""
+
+    T = typing.TypeVar("T")
+    N = typing.TypeVar("N", bound=int)
+
+    @type_checked
+    def _run_test(anything:T, number:N) -> T:
+        return anything, number
+
+    assert _run_test("a", "2") == ("a", 2)
+
+
+def test_literal():
+    """A Literal takes only its own values, compared with their type."""
+
+    @type_checked
+    def _run_test(mode:typing.Literal["r", "w"],
+                  flag:typing.Optional[typing.Literal[1]]=None):
+        return mode, flag
+
+    assert _run_test("r") == ("r", None)
+    assert _run_test("w", 1) == ("w", 1)
+
+    for args in (("x",), (["r"],), ("r", True)):
+        with pytest.raises(TypeError):
+            _run_test(*args)
+
+    with pytest.raises(TypeError) as error:
+        _run_test("a")
+    assert "expecting Literal['r', 'w']" in str(error.value)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    ((1, 1), ("a", "a"), (None, None), ([1], [1]), ("2.5", "2.5"), (2.5, 2)),
+    ids=("int", "str", "none", "list", "str not coerced", "coerced"),
+)
+def test_union(value, expected):
+    """Members which take the value as is come first, then coercion."""
+
+    validator = compile_spec(typing.Union[int, str, None, typing.List[int]])
+    result = validator(value)
+    assert result == expected
+    assert type(result) is type(expected)
+
+
+def test_union_order():
+    """Members are tried in order, equal unions aren't merged."""
+
+    assert compile_spec(typing.Union[int, float])("2.5") == 2
+    assert compile_spec(typing.Union[float, int])("2.5") == 2.5
+    assert compile_spec(int | None)("3") == 3
+
+
+def test_union_failed_member():
+    """A value failing the member of its type can pass another member."""
+
+    validator = compile_spec(typing.Union[typing.List[int], typing.List[str]])
+    assert validator(["a"]) == ["a"]
+
+    with Config.override(coerce=False):
+        with pytest.raises(TypeError) as error:
+            validator([1.5])
+
+    assert error.value.args[0] == (
+        "[1.5] is of type list, expecting List[int] or List[str].")
+
+
+@typing.runtime_checkable
+class HasName(typing.Protocol):
+    name: str
+
+
+class Named(object):
+    name = "named"
+
+
+def test_union_data_protocol():
+    """Protocols which issubclass() refuses are still tried as members."""
+
+    validator = compile_spec(typing.Optional[HasName])
+    assert validator(None) is None
+
+    named = Named()
+    assert validator(named) is named
+
+
+def test_union_dispatch():
+    """The member for each type is looked up along the MRO and kept."""
+
+    class MyInt(int):
+        pass
+
+    validator = UnionValidator(typing.Union[str, int, bool])
+    assert validator(MyInt(5)) == 5
+    assert validator(True) is True
+    assert validator._dispatch[MyInt] is validator.members[1]
+    assert validator._dispatch[bool] is validator.members[2]
+
+    copied = pickle.loads(pickle.dumps(validator))
+    assert copied.spec == validator.spec
+    assert MyInt not in copied._dispatch
+
+
+def test_forward_reference():
+    """String annotations are evaluated in the function's module."""
+
+    @type_checked
+    def _run_test(first:"int", second:"typing.List[Later]"):
+        return first, second
+
+    assert _run_test("1", [Later()])[0] == 1
+
+    @type_checked
+    def _run_test(something:"not a type"):
+        pass
+
+    with pytest.raises(ValueError):
+        _run_test(1)
+
+
+def test_nested_forward_reference():
+    """Strings nested in a hint are evaluated in the function's module."""
+
+    @type_checked(coerce=False)
+    def _run_test(first:typing.Optional["Later"],
+                  second:typing.List["Later"],
+                  third:"typing.Dict[str, typing.Optional['Later']]"=None):
+        return first, second, third
+
+    later = Later()
+    assert _run_test(later, [later], {"a": None}) == (
+        later, [later], {"a": None})
+    assert _run_test(None, []) == (None, [], None)
+
+    with pytest.raises(TypeError) as error:
+        _run_test(1, [])
+
+    assert "1 is of type int, expecting Later or None." in error.value.args
+
+
+class Later(object):
+    pass
@@ -0,0 +1,276 @@
+"""Tests for pychecked's compiled validators.
+
+Copyright (c) 2015, Activision Publishing, Inc.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of Activision Publishing, Inc. nor the names of its
+  contributors may be used to endorse or promote products derived from this
+  software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+
+import gc
+import pickle
+import pytest
+
+from pychecked.type_checking import BindingPlan
+from pychecked.type_checking import Config
+from pychecked.type_checking import type_checked
+from pychecked.validators import _INTERNED
+from pychecked.validators import _NEVER
+from pychecked.validators import compile_spec
+from pychecked.validators import DictValidator
+from pychecked.validators import SequenceValidator
+from pychecked.validators import TypeValidator
+from pychecked.validators import ValidatingIterator
+
+
+def test_interned():
+    """Structurally identical specs share the same compiled validator."""
+
+    first = compile_spec({str: (bool, int, {str: int}, str)})
+    second = compile_spec({str: (bool, int, {str: int}, str)})
+    assert first is second
+    assert compile_spec([int]) is compile_spec([int])
+    assert compile_spec([int]) is not compile_spec((int,))
+    assert compile_spec([]) is compile_spec(list)
+
+
+def test_interned_shared_between_functions():
+    """Functions with the same annotation point to the same validator."""
+
+    def _run_test(something:[int]): pass
+
+    def _run_test2(something_else:[int]): pass
+
+    first = BindingPlan(_run_test).positional[0]
+    assert first is BindingPlan(_run_test2).positional[0]
+    assert first is compile_spec([int])
+
+
+def test_tree_shape():
+    """The validator tree mirrors the nesting of the spec."""
+
+    validator = compile_spec({str: [(int, str)]})
+    assert isinstance(validator, DictValidator)
+    assert isinstance(validator.keys, TypeValidator)
+    assert isinstance(validator.values, SequenceValidator)
+    assert isinstance(validator.values.items[0], SequenceValidator)
+
+
+def test_unhashable_spec():
+    """Specs which can't be interned are still compiled."""
+
+    class Unhashable(object):
+        __hash__ = None
+
+        def __call__(self, value):
+            return value * 2
+
+    validator = compile_spec([Unhashable()])
+    assert validator([1, 2]) == [2, 4]
+
+
+def test_released():
+    """Interned validators are released once nothing is using them."""
+
+    class Released(object): pass
+
+    compile_spec([Released])
+    gc.collect()
+    assert not any(
+        (type, Released) in key[1] for key in _INTERNED.keys()
+        if isinstance(key[1], tuple)
+    )
+
+
+def test_bools_are_bools():
+    """A bool passes through an annotation of bool, even without coercion."""
+
+    @type_checked(coerce=False)
+    def _run_test(something:bool, other:object):
+        return something, other
+
+    assert _run_test(True, False) == (True, False)
+
+    with pytest.raises(TypeError):
+        compile_spec(int)(True)
+
+
+def test_nested_error_name():
+    """Nested specs are named in the length mismatch error."""
+
+    validator = compile_spec([(int, str), (int, str)])
+    with pytest.raises(TypeError) as error:
+        validator([1, 2, 3])
+
+    assert error.exconly() == (
+        "pychecked.errors.PycheckedTypeError: Argument length mismatch. "
+        "Expected a list of a tuple of int, str, a tuple of int, str."
+    )
+
+
+@pytest.mark.parametrize(
+    "spec,value",
+    (
+        ([int], [1, 2, 3]),
+        ((str, int, bool), ("a", 1, True)),
+        ([str, int], ["a", 1]),
+        ({int: str}, {1: "a", 2: "b"}),
+        ({str: [(int, str)]}, {"a": [(1, "b"), (2, "c")]}),
+    ),
+    ids=("homogeneous", "tuple", "positional", "dict", "nested"),
+)
+def test_unchanged_not_copied(spec, value):
+    """Containers which needed no coercion are returned as they were."""
+
+    assert compile_spec(spec)(value) is value
+
+
+def test_changed_copied():
+    """The input is never mutated, a copy is made on the first change."""
+
+    value = [1, 2, "3", 4]
+    result = compile_spec([int])(value)
+    assert result == [1, 2, 3, 4]
+    assert value == [1, 2, "3", 4]
+
+    value = {1: "a", "2": "b", 3: "c"}
+    result = compile_spec({int: str})(value)
+    assert result == {1: "a", 2: "b", 3: "c"}
+    assert list(result) == [1, 2, 3]
+    assert value == {1: "a", "2": "b", 3: "c"}
+
+    inner = [1, 2]
+    value = [inner, [3, "4"]]
+    result = compile_spec([[int]])(value)
+    assert result == [[1, 2], [3, 4]]
+    assert result[0] is inner
+    assert value[1] == [3, "4"]
+
+
+def test_container_type_kept():
+    """The type returned is the same as before copy on write."""
+
+    assert compile_spec([int])((1, 2, 3)) == [1, 2, 3]
+    assert compile_spec((int, int))([1, 2]) == (1, 2)
+    assert compile_spec((int,))((1, 2)) == [1, 2]
+
+
+def test_lazy_iterator():
+    """Iterators are validated as they are consumed in lazy mode."""
+
+    consumed = []
+
+    def _numbers():
+        for number in ("1", 2, "3", "four", 5):
+            consumed.append(number)
+            yield number
+
+    @type_checked
+    def _run_test(numbers:[int]):
+        return numbers
+
+    with Config.override(lazy=True):
+        result = _run_test(_numbers())
+
+    assert consumed == []
+    assert isinstance(result, ValidatingIterator)
+    assert next(result) == 1
+    assert consumed == ["1"]
+    assert [next(result), next(result)] == [2, 3]
+
+    with pytest.raises(TypeError):
+        next(result)
+    assert result.index == 3
+
+
+def test_lazy_only_iterators():
+    """Containers and positional specs are not made lazy."""
+
+    with Config.override(lazy=True):
+        assert compile_spec([int])(("1", "2")) == [1, 2]
+        assert compile_spec([int])({"1": 1}.keys()) == [1]
+        assert compile_spec((int, str))(iter("12")) == (1, "2")
+
+    assert compile_spec([int])(iter("12")) == [1, 2]
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    (("12", 12), (" -12 ", -12), ("3.0", 3), ("1e3", 1000),
+     ("123456789012345678901234567890", 123456789012345678901234567890),
+     ("1_000_000_000_000_000_000_001", 1000000000000000000001)),
+    ids=("int", "spaces", "float", "exponent", "big", "underscores"),
+)
+def test_str_to_int(value, expected):
+    """Strings go to int directly when they can, through float otherwise."""
+
+    assert compile_spec(int)(value) == expected
+
+
+def test_failed_coercion_remembered():
+    """Builtins which can't ever be coerced are failed without retrying."""
+
+    class Number(object):
+        def __int__(self):
+            raise TypeError("not today")
+
+    validator = TypeValidator(int)
+    for value in (None, None, Number()):
+        with pytest.raises(TypeError) as error:
+            validator(value)
+        assert "expecting int." in error.value.args[0]
+
+    assert validator._strategies[type(None)] is _NEVER
+    assert validator._strategies[Number] is not _NEVER
+
+    with pytest.raises(TypeError):
+        validator("abc")
+    assert validator("7") == 7
+
+
+class Point(object):
+    def __init__(self, x_y):
+        self.x, self.y = x_y
+
+
+def test_pickle():
+    """Validators pickle as their spec, and load as the interned one."""
+
+    validator = compile_spec({str: [(int, float, Point)]})
+    validator({"a": [("1", 2, (3, 4))]})  # fill the coercion caches
+
+    data = pickle.dumps(validator)
+    assert pickle.loads(data) is validator
+    assert b"compile_spec" in data
+    assert b"Point" in data
+    assert b"Validator" not in data
+    assert len(data) < 200
+
+    del validator
+    gc.collect()
+    copied = pickle.loads(data)
+    assert copied is compile_spec({str: [(int, float, Point)]})
+    assert copied({"a": [("1", 2, (3, 4))]})["a"][0][:2] == (1, 2.0)